@@ -0,0 +1,199 @@
+"""
+Benchmarks of json_timeseries hot paths.
+
+Measures throughput and peak memory of TimeSeries construction, insert, JtsDocument.toJSONString,
+JtsDocument.fromJSON and JtsDocument.getSeries on synthetic datasets, and compares them with a stored baseline.
+
+Usage::
+
+    python -m benchmarks.bench_jts                      # run and compare with benchmarks/baseline.json
+    python -m benchmarks.bench_jts --save-baseline      # run and store results as the baseline
+    python -m benchmarks.bench_jts --quick -k toJSON    # smaller datasets, only matching benchmarks
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from json_timeseries import TsRecord, TimeSeries, JtsDocument
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# name: (rows, columns, share of fields present, data type, columnar storage)
+DATASETS = {
+    'narrow': (100000, 1, 1.0, 'NUMBER', False),
+    'wide': (2000, 200, 1.0, 'NUMBER', False),
+    # a few series sharing one time axis, the common shape of exported documents
+    'aligned': (20000, 10, 1.0, 'NUMBER', False),
+    'sparse': (20000, 20, 0.1, 'NUMBER', False),
+    'text': (20000, 5, 1.0, 'TEXT', False),
+    'columnar': (100000, 1, 1.0, 'NUMBER', True),
+}
+QUICK_SCALE = 10
+
+
+class Dataset:
+    """
+    Synthetic series records, reproducible for the same parameters
+    """
+
+    def __init__(self, name: str, rows: int, columns: int, density: float, data_type: str, columnar: bool):
+        self.name = name
+        self.data_type = data_type
+        self.columnar = columnar
+        rnd = random.Random(name)
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        timestamps = [start + timedelta(seconds=i) for i in range(rows)]
+
+        self.columns = []
+        for c in range(columns):
+            records = []
+            for ts in timestamps:
+                if density < 1.0 and rnd.random() >= density:
+                    continue
+                value = rnd.random() * 100
+                records.append(TsRecord(ts, value if data_type == 'NUMBER' else 'value %.3f' % value,
+                                        quality=192 if rnd.random() < 0.1 else None))
+            self.columns.append(records)
+        self.records = sum(len(records) for records in self.columns)
+
+    def series(self) -> list:
+        return [TimeSeries(name='Series %d' % c, identifier='series_%d' % c, data_type=self.data_type,
+                           records=list(records), columnar=self.columnar)
+                for c, records in enumerate(self.columns)]
+
+    def document(self) -> JtsDocument:
+        return JtsDocument(self.series())
+
+
+def bench_construct(dataset: Dataset):
+    return lambda: dataset.series(), dataset.records
+
+
+def bench_insert(dataset: Dataset):
+    def run():
+        for c, records in enumerate(dataset.columns):
+            ts = TimeSeries(name='Series %d' % c, identifier='series_%d' % c, data_type=dataset.data_type,
+                            columnar=dataset.columnar)
+            for r in records:
+                ts.insert(r)
+
+    return run, dataset.records
+
+
+def bench_toJSONString(dataset: Dataset):
+    jts_doc = dataset.document()
+    return jts_doc.toJSONString, dataset.records
+
+
+def bench_fromJSON(dataset: Dataset):
+    json_str = dataset.document().toJSONString()
+    return lambda: JtsDocument.fromJSON(json_str), dataset.records
+
+
+def bench_getSeries(dataset: Dataset):
+    jts_doc = dataset.document()
+    identifiers = [s.identifier for s in jts_doc.series] * max(1, 1000 // len(jts_doc.series))
+
+    def run():
+        for identifier in identifiers:
+            jts_doc.getSeries(identifier)
+
+    return run, len(identifiers)
+
+
+BENCHMARKS = [bench_construct, bench_insert, bench_toJSONString, bench_fromJSON, bench_getSeries]
+
+
+def measure(run, repeat: int) -> tuple:
+    """
+    Best wall time of repeated runs, and peak traced memory of one more run
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(quick: bool = False, keyword: str = None, repeat: int = 3) -> dict:
+    results = {}
+    for name, (rows, columns, density, data_type, columnar) in DATASETS.items():
+        selected = [b for b in BENCHMARKS
+                    if not keyword or keyword in '%s.%s' % (name, b.__name__[len('bench_'):])]
+        if not selected:
+            continue
+        dataset = Dataset(name, rows // QUICK_SCALE if quick else rows, columns, density, data_type, columnar)
+        for bench in selected:
+            key = '%s.%s' % (name, bench.__name__[len('bench_'):])
+            run, operations = bench(dataset)
+            seconds, peak = measure(run, repeat)
+            results[key] = dict(throughput=operations / seconds, seconds=seconds, peak_bytes=peak)
+            print('%-24s %14.0f ops/s %10.3f s %10.1f MB' % (key, operations / seconds, seconds, peak / 1e6))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Print results relative to the baseline. Returns names of benchmarks slower than baseline by more than tolerance
+    """
+    regressions = []
+    print('\n%-24s %12s %12s' % ('vs baseline', 'throughput', 'peak memory'))
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        speed = result['throughput'] / base['throughput']
+        memory = result['peak_bytes'] / base['peak_bytes'] if base['peak_bytes'] else 1.0
+        slower = speed < 1.0 - tolerance
+        if slower:
+            regressions.append(key)
+        print('%-24s %11.2fx %11.2fx%s' % (key, speed, memory, '  REGRESSION' if slower else ''))
+    return regressions
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--quick', action='store_true', help='use datasets %d times smaller' % QUICK_SCALE)
+    arg_parser.add_argument('-k', dest='keyword', help='only run benchmarks whose name contains KEYWORD')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (best is kept)')
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results file')
+    arg_parser.add_argument('--save-baseline', action='store_true', help='store results as the baseline')
+    arg_parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='allowed throughput drop against the baseline (default 0.2 = 20%%)')
+    args = arg_parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick, args.keyword, args.repeat)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+        print('\nBaseline saved to %s' % args.baseline)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            regressions = compare(results, json.load(fp), args.tolerance)
+        if regressions:
+            print('\n%d benchmark(s) regressed: %s' % (len(regressions), ', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,6 @@
 from json_timeseries.jts import TsRecord
+from json_timeseries.jts import ColumnarRecords
 from json_timeseries.jts import TimeSeries
 from json_timeseries.jts import JtsDocument
+from json_timeseries.jts import JtsReader
+from json_timeseries.jts import JtsStats
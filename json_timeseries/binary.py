@@ -0,0 +1,397 @@
+"""
+Compact binary encoding of TimeSeries and JtsDocument.
+
+Every series is encoded column by column from its ColumnarRecords storage:
+
+- timestamps as delta-of-delta of epoch milliseconds, with runs of equal deltas collapsed
+- 'NUMBER' values as XOR of the float bits with the previous value, byte aligned (Gorilla style)
+- value kinds (int, float, missing) and quality codes run-length encoded
+- annotations, timezones and values of other data types in sparse or dictionary encoded form
+
+Integers are LEB128 varints, signed integers zigzag encoded. Decoded series are columnar and
+produce the same JTS document as the encoded ones.
+"""
+import importlib
+import json
+from array import array
+from datetime import timedelta, timezone
+
+from json_timeseries.jts import ColumnarRecords, TimeSeries, JtsDocument, _UNSET
+
+MAGIC = b'JTSB'
+FORMAT_VERSION = 1
+_SERIES, _DOCUMENT = 0x53, 0x44  # 'S', 'D'
+
+# value tags
+_NULL, _STR, _STR_REF, _JSON, _FALSE, _TRUE, _INT = range(7)
+# timezone tags
+_NAIVE, _FIXED, _NAMED = range(3)
+
+
+def encode_series(ts: TimeSeries) -> bytes:
+    out = bytearray(MAGIC)
+    out += bytes((FORMAT_VERSION, _SERIES))
+    _put_series(out, ts)
+    return bytes(out)
+
+
+def decode_series(data: bytes) -> TimeSeries:
+    reader = _Reader(data, _SERIES)
+    ts = reader.series()
+    reader.end()
+    return ts
+
+
+def encode_document(jts_doc: JtsDocument) -> bytes:
+    out = bytearray(MAGIC)
+    out += bytes((FORMAT_VERSION, _DOCUMENT))
+    _put_str(out, jts_doc.version)
+    _put_uint(out, len(jts_doc.series))
+    for ts in jts_doc.series:
+        _put_series(out, ts)
+    return bytes(out)
+
+
+def decode_document(data: bytes) -> JtsDocument:
+    reader = _Reader(data, _DOCUMENT)
+    version = reader.str()
+    series = [reader.series() for _ in range(reader.uint())]
+    reader.end()
+    return JtsDocument(series, version)
+
+
+def _put_uint(out: bytearray, n: int):
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _put_str(out: bytearray, s):
+    # None is encoded as length 0, strings as length + 1
+    if s is None:
+        out.append(0)
+        return
+    encoded = str(s).encode('utf-8')
+    _put_uint(out, len(encoded) + 1)
+    out += encoded
+
+
+def _put_value(out: bytearray, v, strings: dict):
+    if v is None:
+        out.append(_NULL)
+    elif v is False or v is True:
+        out.append(_TRUE if v else _FALSE)
+    elif type(v) is int:
+        out.append(_INT)
+        _put_uint(out, _zigzag(v))
+    elif type(v) is str:
+        ref = strings.get(v)
+        if ref is None:
+            strings[v] = len(strings)
+            out.append(_STR)
+            _put_str(out, v)
+        else:
+            out.append(_STR_REF)
+            _put_uint(out, ref)
+    else:
+        out.append(_JSON)
+        _put_str(out, json.dumps(v))
+
+
+def _put_tz(out: bytearray, tz):
+    if tz is None or tz is _UNSET:
+        out.append(_NAIVE)
+    elif tz.utcoffset(None) is not None:
+        out.append(_FIXED)
+        _put_uint(out, _zigzag(tz.utcoffset(None) // timedelta(microseconds=1)))
+    elif getattr(tz, 'key', None):
+        # zoneinfo.ZoneInfo
+        out.append(_NAMED)
+        _put_str(out, tz.key)
+    else:
+        raise ValueError("Timezone '%s' cannot be encoded. Use a fixed offset or zoneinfo timezone" % tz)
+
+
+def _put_runs(out: bytearray, codes):
+    # (code, run length) pairs of non-negative int codes
+    run = 0
+    current = None
+    for code in codes:
+        if code == current:
+            run += 1
+            continue
+        if run:
+            _put_uint(out, current)
+            _put_uint(out, run)
+        current, run = code, 1
+    if run:
+        _put_uint(out, current)
+        _put_uint(out, run)
+
+
+def _put_series(out: bytearray, ts: TimeSeries):
+    store = ts.records
+    if not isinstance(store, ColumnarRecords):
+        store = ColumnarRecords(ts.data_type, store)
+
+    for s in (ts.identifier, ts.name, ts.units, ts.data_type, store.data_type):
+        _put_str(out, s)
+    n = len(store)
+    _put_uint(out, n)
+
+    # timezones: table of distinct ones, the storage one first, then sparse per record overrides
+    zones = [store.tz]
+    zone_index = {}
+    overrides = []
+    for i, tz in sorted(store._tz.items()):
+        key = id(tz)
+        if key not in zone_index:
+            zone_index[key] = len(zones)
+            zones.append(tz)
+        overrides.append((i, zone_index[key]))
+    _put_uint(out, len(zones))
+    for tz in zones:
+        _put_tz(out, tz)
+    _put_sparse(out, overrides, _put_uint)
+
+    # timestamps: first one, then delta-of-delta tokens. Odd tokens are runs of zero delta-of-deltas
+    timestamps = store.timestamps
+    if n:
+        _put_uint(out, _zigzag(timestamps[0]))
+    previous, delta, zeros = timestamps[0] if n else 0, 0, 0
+    for ms in timestamps[1:]:
+        dod = ms - previous - delta
+        delta = ms - previous
+        previous = ms
+        if not dod:
+            zeros += 1
+            continue
+        if zeros:
+            _put_uint(out, zeros << 1 | 1)
+            zeros = 0
+        _put_uint(out, _zigzag(dod) << 1)
+    if zeros:
+        _put_uint(out, zeros << 1 | 1)
+
+    strings = {}
+    if store.data_type == 'NUMBER':
+        _put_floats(out, store.values)
+        if store._kinds is None:
+            out.append(0)
+        else:
+            out.append(1)
+            _put_runs(out, store._kinds)
+        _put_sparse(out, sorted(store._objects.items()), lambda o, v: _put_value(o, v, strings))
+    else:
+        for v in store.values:
+            _put_value(out, v, strings)
+
+    quality = store.quality
+    if quality:
+        out.append(1)
+        _put_runs(out, (_zigzag(quality[i]) + 1 if i in quality else 0 for i in range(n)))
+    else:
+        out.append(0)
+
+    _put_sparse(out, sorted(store.annotation.items()), lambda o, v: _put_value(o, v, strings))
+
+
+def _put_sparse(out: bytearray, items, put):
+    # number of (index, value) items, then index deltas and values
+    _put_uint(out, len(items))
+    previous = 0
+    for i, v in items:
+        _put_uint(out, i - previous)
+        previous = i
+        put(out, v)
+
+
+def _put_floats(out: bytearray, values: array):
+    bits = array('Q')
+    bits.frombytes(values.tobytes())
+    previous = 0
+    for b in bits:
+        x = b ^ previous
+        previous = b
+        if not x:
+            out.append(0)
+            continue
+        # control byte: leading zero bytes and number of meaningful bytes, trailing zero bytes are implied
+        lead = (64 - x.bit_length()) >> 3
+        trail = ((x & -x).bit_length() - 1) >> 3
+        size = 8 - lead - trail
+        out.append(lead << 4 | size)
+        out += (x >> (trail << 3)).to_bytes(size, 'little')
+
+
+class _Reader:
+    def __init__(self, data: bytes, kind: int):
+        self.data = bytes(data)
+        self.pos = 6
+        if self.data[:4] != MAGIC:
+            raise ValueError("Not a binary JTS encoding")
+        if self.data[4:5] != bytes((FORMAT_VERSION,)):
+            raise ValueError("Unsupported binary JTS format version")
+        if self.data[5:6] != bytes((kind,)):
+            raise ValueError("Binary JTS encoding is not a %s" % ('TimeSeries' if kind == _SERIES else 'JtsDocument'))
+        self.strings = []
+
+    def end(self):
+        if self.pos != len(self.data):
+            raise ValueError("Unexpected data after the end of binary JTS encoding")
+
+    def uint(self) -> int:
+        data = self.data
+        pos = self.pos
+        try:
+            b = data[pos]
+            n = b & 0x7f
+            shift = 7
+            while b & 0x80:
+                pos += 1
+                b = data[pos]
+                n |= (b & 0x7f) << shift
+                shift += 7
+        except IndexError:
+            raise ValueError("Truncated binary JTS encoding") from None
+        self.pos = pos + 1
+        return n
+
+    def sint(self) -> int:
+        n = self.uint()
+        return -(n + 1 >> 1) if n & 1 else n >> 1
+
+    def bytes(self, size: int) -> bytes:
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("Truncated binary JTS encoding")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def str(self):
+        size = self.uint()
+        return self.bytes(size - 1).decode('utf-8') if size else None
+
+    def value(self):
+        tag = self.uint()
+        if tag == _NULL:
+            return None
+        if tag == _FALSE or tag == _TRUE:
+            return tag == _TRUE
+        if tag == _INT:
+            return self.sint()
+        if tag == _STR:
+            s = self.str()
+            self.strings.append(s)
+            return s
+        if tag == _STR_REF:
+            return self.strings[self.uint()]
+        if tag == _JSON:
+            return json.loads(self.str())
+        raise ValueError("Invalid value in binary JTS encoding")
+
+    def tz(self):
+        tag = self.uint()
+        if tag == _NAIVE:
+            return None
+        if tag == _FIXED:
+            offset = self.sint()
+            return timezone(timedelta(microseconds=offset)) if offset else timezone.utc
+        if tag == _NAMED:
+            return importlib.import_module('zoneinfo').ZoneInfo(self.str())
+        raise ValueError("Invalid timezone in binary JTS encoding")
+
+    def sparse(self, get) -> dict:
+        items = {}
+        i = 0
+        for _ in range(self.uint()):
+            i += self.uint()
+            items[i] = get()
+        return items
+
+    def runs(self, n: int) -> list:
+        codes = []
+        while len(codes) < n:
+            code = self.uint()
+            codes.extend([code] * self.uint())
+        if len(codes) != n:
+            raise ValueError("Invalid run length in binary JTS encoding")
+        return codes
+
+    def series(self) -> TimeSeries:
+        self.strings = []
+        identifier, name, units, data_type, store_type = (self.str() for _ in range(5))
+        n = self.uint()
+        store = ColumnarRecords(store_type)
+
+        zones = [self.tz() for _ in range(self.uint())]
+        store.tz = zones[0] if n else _UNSET
+        store._tz = {i: zones[z] for i, z in self.sparse(self.uint).items()}
+
+        timestamps = store.timestamps
+        if n:
+            previous = self.sint()
+            timestamps.append(previous)
+            delta = 0
+            while len(timestamps) < n:
+                token = self.uint()
+                if token & 1:
+                    # run of equal deltas
+                    timestamps.extend(range(previous + delta, previous + delta * ((token >> 1) + 1), delta)
+                                      if delta else [previous] * (token >> 1))
+                    previous = timestamps[-1]
+                else:
+                    token >>= 1
+                    delta += -(token + 1 >> 1) if token & 1 else token >> 1
+                    previous += delta
+                    timestamps.append(previous)
+            if len(timestamps) != n:
+                raise ValueError("Invalid timestamps in binary JTS encoding")
+
+        if store_type == 'NUMBER':
+            store.values = self.floats(n)
+            if self.uint():
+                store._kinds = array('b', self.runs(n))
+            store._objects = self.sparse(self.value)
+        else:
+            store.values = [self.value() for _ in range(n)]
+
+        if self.uint():
+            # codes are zigzag encoded quality + 1, 0 for records without quality
+            store.quality = {i: (code - 1 >> 1) if code & 1 else -(code >> 1)
+                             for i, code in enumerate(self.runs(n)) if code}
+        store.annotation = self.sparse(self.value)
+
+        return TimeSeries(name=name, units=units, identifier=identifier, data_type=data_type, records=store)
+
+    def floats(self, n: int) -> array:
+        data = self.data
+        pos = self.pos
+        bits = array('Q')
+        append = bits.append
+        previous = 0
+        try:
+            for _ in range(n):
+                control = data[pos]
+                pos += 1
+                if control:
+                    size = control & 0x0f
+                    trail = 8 - (control >> 4) - size
+                    previous ^= int.from_bytes(data[pos:pos + size], 'little') << (trail << 3)
+                    pos += size
+                append(previous)
+        except IndexError:
+            raise ValueError("Truncated binary JTS encoding") from None
+        if pos > len(data):
+            raise ValueError("Truncated binary JTS encoding")
+        self.pos = pos
+
+        values = array('d')
+        values.frombytes(bits.tobytes())
+        return values
@@ -0,0 +1,348 @@
+"""
+Bulk ingest of CSV and NDJSON (one JSON object per line) into columnar TimeSeries.
+
+Rows are read in batches and converted column by column straight into ColumnarRecords storage,
+without creating TsRecord objects. Every value column of the file becomes a series with the column
+name as id and name; quality and annotation columns can be assigned to value columns.
+Records whose value, quality and annotation are all missing are not stored.
+
+Timestamps are parsed according to ``timestamp_format``:
+
+- None: ISO 8601. Timestamps laid out as 'YYYY-MM-DD HH:MM:SS' (or with 'T'), optionally followed by
+  fractional seconds and an offset, take a fast path: the date, hour and minute with the offset are
+  converted once per minute and only the seconds are parsed per row. Anything else is parsed one by one
+- 'epoch_s' or 'epoch_ms': seconds or milliseconds since the Unix epoch, as UTC unless tz is specified
+- any other string: ``datetime.strptime`` format
+
+Naive timestamps get the timezone tz if it is specified, otherwise they stay naive (wall-clock time).
+"""
+import contextlib
+import csv
+import io
+import os
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from json_timeseries.jts import ColumnarRecords, TimeSeries, JtsDocument, _batched, _epoch_ms, _json_codec, \
+    _parse_timestamp
+
+_EPOCH_FORMATS = ('epoch_s', 'epoch_ms')
+# cached minutes of the fast ISO 8601 path, cleared when exceeded
+_MAX_CACHED_MINUTES = 10000
+
+
+def read_csv(source, timestamp: str = 'timestamp', columns: List[str] = None, quality: Dict[str, str] = None,
+             annotation: Dict[str, str] = None, data_types: Dict[str, str] = None, units: Dict[str, str] = None,
+             timestamp_format: str = None, tz=None, delimiter: str = ',', batch_size: int = 10000,
+             version: str = "1.0") -> JtsDocument:
+    """
+    Read a CSV file with a header row into a JtsDocument with a columnar series per value column.
+    Empty fields are missing values. 'NUMBER' values without decimal point or exponent are read as int.
+
+    :param source: Path, or text or binary file-like object
+    :param timestamp: Name of the timestamp column
+    :type timestamp: str, optional
+    :param columns: Value columns to read, in this order. All columns other than timestamp, quality and annotation
+        columns if not specified
+    :type columns: List[str], optional
+    :param quality: Quality column of value columns
+    :type quality: Dict[str, str], optional
+    :param annotation: Annotation column of value columns
+    :type annotation: Dict[str, str], optional
+    :param data_types: Data type of value columns, 'NUMBER' if not specified
+    :type data_types: Dict[str, str], optional
+    :param units: Units of value columns
+    :type units: Dict[str, str], optional
+    :param timestamp_format: None for ISO 8601, 'epoch_s', 'epoch_ms' or a strptime format
+    :type timestamp_format: str, optional
+    :param tz: Timezone of naive and epoch timestamps
+    :type tz: tzinfo, optional
+    :param delimiter: Field delimiter
+    :type delimiter: str, optional
+    :param batch_size: Number of rows converted at once
+    :type batch_size: int, optional
+    :param version: JTS version of the document
+    :type version: str, optional
+    :rtype: JtsDocument
+    :raise [ValueError]: [Missing columns, rows of another length than the header, invalid timestamps or values]
+    """
+    with _open_text(source, newline='') as fp:
+        reader = csv.reader(fp, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("CSV has no header row")
+        loader = _Loader(header, timestamp, columns, quality, annotation, data_types, units, timestamp_format, tz)
+        indexes = [header.index(name) for name in loader.names]
+        width = len(header)
+
+        for number, batch in enumerate(_batched(reader, batch_size)):
+            if min(map(len, batch)) != width or max(map(len, batch)) != width:
+                for i, row in enumerate(batch):
+                    if row and len(row) != width:
+                        raise ValueError("CSV data row %d has %d fields, the header has %d"
+                                         % (number * batch_size + i + 1, len(row), width))
+                # blank lines are skipped
+                batch = [row for row in batch if row]
+                if not batch:
+                    continue
+            fields = list(zip(*batch))
+            loader.load([fields[i] for i in indexes], _csv_value)
+
+    return loader.document(version)
+
+
+def read_ndjson(source, timestamp: str = 'timestamp', columns: List[str] = None, quality: Dict[str, str] = None,
+                annotation: Dict[str, str] = None, data_types: Dict[str, str] = None, units: Dict[str, str] = None,
+                timestamp_format: str = None, tz=None, batch_size: int = 10000, backend: str = None,
+                version: str = "1.0") -> JtsDocument:
+    """
+    Read NDJSON, a JSON object per line, into a JtsDocument with a columnar series per value key.
+    Missing keys and null are missing values. Value keys are taken from the first object if columns
+    are not specified. See read_csv() for the other parameters.
+
+    :param source: Path, or text or binary file-like object
+    :param backend: JSON library to decode lines with, see JtsDocument.toJSONBytes()
+    :type backend: str, optional
+    :rtype: JtsDocument
+    :raise [ValueError]: [Missing or invalid timestamps, invalid JSON or quality codes]
+    :raise [TypeError]: ['NUMBER' values are not int or float]
+    """
+    decode = _json_codec(backend)[1]
+    loader = None
+    with _open_text(source) as fp:
+        for batch in _batched(filter(str.strip, fp), batch_size):
+            objects = [decode(line) for line in batch]
+            if loader is None:
+                # keys of the first object and the columns named, which may be missing from it
+                named = [timestamp] + list(columns or ()) + list((quality or {}).values()) \
+                    + list((annotation or {}).values())
+                loader = _Loader(list(dict.fromkeys(list(objects[0]) + named)), timestamp, columns, quality,
+                                 annotation, data_types, units, timestamp_format, tz)
+            loader.load([[o.get(name) for o in objects] for name in loader.names], _json_value)
+
+    if loader is None:
+        loader = _Loader([timestamp] + list(columns or ()), timestamp, columns, quality, annotation, data_types,
+                         units, timestamp_format, tz)
+    return loader.document(version)
+
+
+@contextlib.contextmanager
+def _open_text(source, newline: str = None):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding='utf-8', newline=newline) as fp:
+            yield fp
+    elif isinstance(source.read(0), bytes):
+        fp = io.TextIOWrapper(source, encoding='utf-8', newline=newline)
+        try:
+            yield fp
+        finally:
+            # leave the binary file-like object open
+            fp.detach()
+    else:
+        yield source
+
+
+def _csv_value(s: str, data_type: str):
+    # value of a CSV field. Empty fields are missing
+    if not s:
+        return None
+    if data_type != 'NUMBER':
+        return s
+    if '.' in s or 'e' in s or 'E' in s:
+        return float(s)
+    try:
+        return int(s)
+    except ValueError:
+        # e.g. 'nan' or 'inf'
+        return float(s)
+
+
+def _json_value(v, data_type: str):
+    return v
+
+
+class _Loader:
+    """
+    Series of a CSV or NDJSON file, filled batch by batch from its columns
+    """
+
+    def __init__(self, header: list, timestamp: str, columns: List[str], quality: Dict[str, str],
+                 annotation: Dict[str, str], data_types: Dict[str, str], units: Dict[str, str],
+                 timestamp_format: str, tz):
+        quality = quality or {}
+        annotation = annotation or {}
+        data_types = data_types or {}
+        units = units or {}
+        if columns is None:
+            extra = {timestamp} | set(quality.values()) | set(annotation.values())
+            columns = [name for name in header if name not in extra]
+
+        # names of the columns used, the position in this list is the column index of load()
+        self.names = [timestamp]
+        positions = {}
+
+        def position(name):
+            if name not in positions:
+                positions[name] = len(self.names)
+                self.names.append(name)
+            return positions[name]
+
+        missing = [name for name in [timestamp] + list(columns) + list(quality.values()) + list(annotation.values())
+                   if name not in header]
+        if missing:
+            raise ValueError("Columns not found: %s" % ', '.join(missing))
+
+        # (TimeSeries, value column, quality column or None, annotation column or None)
+        self.series = []
+        for name in columns:
+            data_type = data_types.get(name, 'NUMBER')
+            ts = TimeSeries(name=name, identifier=name, units=units.get(name), data_type=data_type,
+                            records=ColumnarRecords(data_type))
+            self.series.append((ts, position(name),
+                                position(quality[name]) if name in quality else None,
+                                position(annotation[name]) if name in annotation else None))
+        self.parse_timestamps = _TimestampParser(timestamp_format, tz)
+
+    def load(self, columns: list, convert):
+        """
+        Add records of a batch of rows given column by column, in the order of self.names.
+        Values are converted by convert(value, data type)
+        """
+        timestamps, zones = self.parse_timestamps(columns[0])
+        n = len(timestamps)
+
+        for ts, value_column, quality_column, annotation_column in self.series:
+            data_type = ts.data_type
+            try:
+                values = [convert(v, data_type) for v in columns[value_column]]
+                quality = [int(q) if q not in (None, '') else None for q in columns[quality_column]] \
+                    if quality_column is not None else None
+            except ValueError as e:
+                raise ValueError("Invalid value in column '%s': %s" % (ts.name, e)) from None
+            annotation = [a if a not in (None, '') else None for a in columns[annotation_column]] \
+                if annotation_column is not None else None
+
+            if None in values:
+                # records without value, quality and annotation are not stored
+                present = [i for i, v in enumerate(values) if v is not None
+                           or (quality is not None and quality[i] is not None)
+                           or (annotation is not None and annotation[i] is not None)]
+                if len(present) < n:
+                    ts.records._extend_columns(array('q', [timestamps[i] for i in present]),
+                                               [zones[i] for i in present],
+                                               [values[i] for i in present],
+                                               [quality[i] for i in present] if quality is not None else None,
+                                               [annotation[i] for i in present] if annotation is not None else None)
+                    continue
+            ts.records._extend_columns(timestamps, zones, values, quality, annotation)
+
+    def document(self, version: str) -> JtsDocument:
+        return JtsDocument([ts for ts, _, _, _ in self.series], version)
+
+
+class _TimestampParser:
+    """
+    Epoch_ms and timezones of a column of timestamps, see the module documentation for the formats.
+    """
+
+    def __init__(self, timestamp_format: str = None, tz=None):
+        self.format = timestamp_format
+        self.tz = tz
+        # (minute prefix, offset suffix) -> (epoch_ms of the minute, tzinfo)
+        self._cache = {}
+        # layout of the last timestamp of the fast path:
+        # (length, minute prefix, offset suffix, fraction end, fraction scale, epoch_ms of the minute, tzinfo)
+        self._last = None
+
+    def __call__(self, strings) -> tuple:
+        timestamps = array('q')
+        zones = []
+        if self.format in _EPOCH_FORMATS:
+            scale = 1000 if self.format == 'epoch_s' else 1
+            tz = self.tz or timezone.utc
+            for s in strings:
+                timestamps.append(self._epoch(s, scale))
+            zones = [tz] * len(timestamps)
+            return timestamps, zones
+
+        append_ms = timestamps.append
+        append_tz = zones.append
+        if self.format is not None:
+            for s in strings:
+                ms, tz = self._other(s)
+                append_ms(ms)
+                append_tz(tz)
+            return timestamps, zones
+
+        iso = self._iso
+        length, prefix, suffix, stop, scale, minute, tz = self._last or (-1, None, None, 0, 0, 0, None)
+        for s in strings:
+            # same minute and layout as the previous timestamp: only seconds and fraction are parsed
+            if s.__class__ is str and len(s) == length and s.startswith(prefix) and s.endswith(suffix) \
+                    and (not stop or s[19] == '.'):
+                try:
+                    append_ms(minute + int(s[17:19]) * 1000 + (int(s[20:stop]) * scale if stop else 0))
+                    append_tz(tz)
+                    continue
+                except ValueError:
+                    pass
+            ms, zone = iso(s)
+            append_ms(ms)
+            append_tz(zone)
+            if self._last is not None:
+                length, prefix, suffix, stop, scale, minute, tz = self._last
+        return timestamps, zones
+
+    @staticmethod
+    def _epoch(s, scale: int) -> int:
+        if s is None or s == '':
+            raise ValueError("Missing timestamp")
+        if type(s) is int:
+            return s * scale
+        if type(s) is str:
+            try:
+                return int(s) * scale
+            except ValueError:
+                pass
+        return round(float(s) * scale)
+
+    def _iso(self, s: str) -> tuple:
+        # fast path of 'YYYY-MM-DD?HH:MM:SS[.fff...][offset]'
+        self._last = None
+        if type(s) is not str or len(s) < 19 or s[4] != '-' or s[13] != ':' or s[16] != ':':
+            return self._other(s)
+        rest = s[19:]
+        if rest[:1] == '.':
+            suffix = rest[1:].lstrip('0123456789')
+            fraction = rest[1:len(rest) - len(suffix)]
+        else:
+            suffix = rest
+            fraction = ''
+        try:
+            ms = int(s[17:19]) * 1000 + (int((fraction + '00')[:3]) if fraction else 0)
+        except ValueError:
+            return self._other(s)
+
+        key = (s[:16], suffix)
+        minute = self._cache.get(key)
+        if minute is None:
+            if len(self._cache) >= _MAX_CACHED_MINUTES:
+                self._cache.clear()
+            dt = self._localize(_parse_timestamp(s[:16] + ':00' + suffix))
+            minute = self._cache[key] = (_epoch_ms(dt), dt.tzinfo)
+        digits = min(len(fraction), 3)
+        self._last = (len(s), key[0], suffix, 20 + digits if digits else 0, 10 ** (3 - digits)) + minute
+        return minute[0] + ms, minute[1]
+
+    def _other(self, s) -> tuple:
+        if not isinstance(s, str) or not s:
+            raise ValueError("Missing timestamp" if s is None or s == '' else "Invalid timestamp %r" % (s,))
+        dt = _parse_timestamp(s) if self.format is None else datetime.strptime(s, self.format)
+        dt = self._localize(dt)
+        return _epoch_ms(dt), dt.tzinfo
+
+    def _localize(self, dt: datetime) -> datetime:
+        if self.tz is not None and dt.tzinfo is None:
+            return dt.replace(tzinfo=self.tz)
+        return dt
@@ -1,12 +1,341 @@
+import asyncio
+import bisect
+import codecs
+import concurrent.futures
+import heapq
+import importlib
+import inspect
+import io
 import json
+import math
+import operator
+import time
 import uuid
-from datetime import datetime
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import chain, islice
 from typing import Union, List
 
 from dateutil import parser
 
 TimeSeriesDataType = ('NUMBER', 'TEXT', 'TIME', 'COORDINATES')
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_ONE_MS = timedelta(milliseconds=1)
+
+
+def _epoch_ms(dt: datetime) -> int:
+    """
+    Milliseconds since the Unix epoch, truncated the same way as ``isoformat(timespec='milliseconds')``.
+    Naive datetimes are wall-clock times and counted as if they were UTC, so that they are written back unchanged
+    whatever the local timezone is.
+    """
+    if dt.tzinfo is None:
+        return (dt - _EPOCH_NAIVE) // _ONE_MS
+    try:
+        return (dt - _EPOCH) // _ONE_MS
+    except TypeError:
+        # timezone without an offset, like a naive datetime
+        return (dt.replace(tzinfo=None) - _EPOCH_NAIVE) // _ONE_MS
+
+
+def _epoch_ms_array(datetimes) -> array:
+    """
+    _epoch_ms of many datetimes as array('q')
+    """
+    try:
+        # timedelta arithmetic is exact, and faster than datetime.timestamp()
+        return array('q', [(dt - _EPOCH) // _ONE_MS for dt in datetimes])
+    except TypeError:
+        # naive datetimes
+        return array('q', [_epoch_ms(dt) for dt in datetimes])
+
+
+def _from_epoch_ms(ms: int, tz=None) -> datetime:
+    """
+    Inverse of _epoch_ms. Returns naive wall-clock time when tz is None.
+    """
+    if tz is None:
+        return _EPOCH_NAIVE + timedelta(0, ms // 1000, ms % 1000 * 1000)
+    return datetime.fromtimestamp(ms // 1000, tz).replace(microsecond=(ms % 1000) * 1000)
+
+
+def _format_ms(ms: int, tz=None) -> str:
+    return _from_epoch_ms(ms, tz).isoformat(timespec='milliseconds')
+
+
+_SECONDS = tuple('%02d.' % s for s in range(60))
+_MILLISECONDS = tuple('%03d' % ms for ms in range(1000))
+
+
+class _TimestampFormatter:
+    """
+    _format_ms for many timestamps. The date, hour and minute prefix and the offset suffix are cached
+    per minute and timezone, so that a timestamp only needs its seconds and milliseconds filled in.
+    Consecutive timestamps of the same minute, e.g. of regular series, skip even the cache lookup.
+    Minutes which do not have a single prefix and offset (offset changes or offsets with seconds) are
+    formatted one timestamp at a time.
+    Timezones are compared by value, as parsed timestamps carry a new timezone object each. Minutes of
+    unhashable timezones are not cached.
+    """
+
+    # cached minutes, the cache is cleared when it grows beyond
+    CACHE_SIZE = 4096
+
+    def __init__(self):
+        self._cache = {}
+        self._minute = None
+        self._tz = _UNSET
+        self._parts = None
+
+    def __call__(self, ms: int, tz=None) -> str:
+        minute = ms // 60000
+        if minute != self._minute or tz != self._tz:
+            key = (tz, minute)
+            cache = self._cache
+            try:
+                parts = cache.get(key, _UNSET)
+            except TypeError:
+                # unhashable timezones (e.g. of dateutil) are only reused by consecutive timestamps
+                parts = self._minute_parts(minute, tz)
+            else:
+                if parts is _UNSET:
+                    if len(cache) >= self.CACHE_SIZE:
+                        cache.clear()
+                    parts = cache[key] = self._minute_parts(minute, tz)
+            self._minute, self._tz, self._parts = minute, tz, parts
+
+        parts = self._parts
+        if parts is None:
+            return _format_ms(ms, tz)
+        return parts[0] + _SECONDS[ms // 1000 % 60] + _MILLISECONDS[ms % 1000] + parts[1]
+
+    @staticmethod
+    def _minute_parts(minute: int, tz):
+        # 'YYYY-MM-DDTHH:MM:' and offset, if the same for the first and the last millisecond of the minute
+        first = _format_ms(minute * 60000, tz)
+        last = _format_ms(minute * 60000 + 59999, tz)
+        if first[17:23] != '00.000' or last[17:23] != '59.999' or first[:17] != last[:17] \
+                or first[23:] != last[23:]:
+            return None
+        return first[:17], first[23:]
+
+
+def _parse_timestamp(s: str) -> datetime:
+    """
+    Parse timestamp of JTS data row. ISO 8601 strings as produced by isoformat() are parsed
+    with datetime.fromisoformat, anything else falls back to dateutil parser.
+    """
+    try:
+        # fromisoformat() accepts 'Z' only since Python 3.11
+        return datetime.fromisoformat(s[:-1] + '+00:00' if s[-1:] == 'Z' else s)
+    except ValueError:
+        return parser.parse(s)
+
+
+def _import_optional(module: str, extra: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError("'%s' is required for this feature. Install it with: pip install json-timeseries[%s]"
+                          % (module, extra)) from None
+
+
+def _is_sorted(keys) -> bool:
+    return all(map(operator.le, keys, islice(keys, 1, None)))
+
+
+_VALIDATION_MODES = ('strict', 'deferred', 'trusted')
+_MERGE_CONFLICTS = ('keep_last', 'keep_first', 'error')
+
+
+def _record_fields(store, i: int) -> tuple:
+    # value, quality and annotation of record i of a list or ColumnarRecords storage
+    if isinstance(store, ColumnarRecords):
+        return store._value(i), store.quality.get(i), store.annotation.get(i)
+    r = store[i]
+    return r.value, r.quality, r.annotation
+
+
+def _record_tz(store, i: int):
+    return store._timezone(i) if isinstance(store, ColumnarRecords) else store[i].timestamp.tzinfo
+
+
+def _check_records(records: list, data_type: str = None):
+    """
+    Check a batch of records: all of them must be TsRecord and, for 'NUMBER' data type, values int or float
+    """
+    if not all(isinstance(r, TsRecord) for r in records):
+        raise TypeError("'records' value must be TsRecord or List[TsRecord]")
+    if data_type != 'NUMBER':
+        return
+    for r in records:
+        if (r.value is not None) and not (isinstance(r.value, (float, int))):
+            raise TypeError(
+                "TimeSeries with data type 'NUMBER' includes TSRecord with value '%s' which is %s. 'NUMBER' "
+                "values must be int or float" % (r.value, type(r.value))
+            )
+
+
+async def _run_step(executor, func, *args):
+    """
+    Run a CPU bound step of async reading or writing in the executor, or inline followed by
+    a switch to other tasks of the event loop
+    """
+    if executor is not None:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    result = func(*args)
+    await asyncio.sleep(0)
+    return result
+
+
+def _copy_column(column, start: int = None, stop: int = None):
+    """
+    Copy of array column[start:stop] as array, also for memoryview columns of segment files
+    """
+    part = column[start:stop]
+    if isinstance(part, (array, list)):
+        return part
+    return array(part.format, part.tobytes())
+
+
+def _row_ts(encoded_row: str) -> str:
+    # "ts" of an encoded data row, which is always its first key
+    return json.loads(encoded_row[:encoded_row.index(', "f": ')] + '}')['ts']
+
+
+def _batched(iterable, size: int):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def _timed(stats, phase: str, func, *args):
+    # func(*args), timed as phase of the stats if there are any
+    if stats is None:
+        return func(*args)
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        stats.add_time(phase, time.perf_counter() - start)
+
+
+def _optional_numpy():
+    try:
+        return importlib.import_module('numpy')
+    except ImportError:
+        return None
+
+
+_AGGREGATES = ('mean', 'min', 'max', 'last', 'count')
+
+
+def _resample(keys, values, step: int, origin: int, agg: str, np=None) -> tuple:
+    """
+    Start keys and aggregates of the step long buckets of sorted keys, in one pass.
+    keys and values are NumPy arrays if np is given, lists otherwise.
+    """
+    if np is not None:
+        if not len(keys):
+            return [], []
+        buckets = (keys - origin) // step
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.append(starts[1:], len(keys))
+        if agg == 'mean':
+            result = np.add.reduceat(values, starts) / (ends - starts)
+        elif agg == 'min':
+            result = np.minimum.reduceat(values, starts)
+        elif agg == 'max':
+            result = np.maximum.reduceat(values, starts)
+        elif agg == 'last':
+            result = values[ends - 1]
+        else:
+            result = ends - starts
+        return (buckets[starts] * step + origin).tolist(), result.tolist()
+
+    out_keys, out_values = [], []
+    bucket = None
+    for ms, v in zip(keys, values):
+        b = (ms - origin) // step
+        if b != bucket:
+            bucket = b
+            out_keys.append(b * step + origin)
+            out_values.append(v if agg != 'count' else 1)
+            total, count = v, 1
+            continue
+        count += 1
+        if agg == 'mean':
+            total += v
+            out_values[-1] = total / count
+        elif agg == 'min':
+            out_values[-1] = min(out_values[-1], v)
+        elif agg == 'max':
+            out_values[-1] = max(out_values[-1], v)
+        elif agg == 'last':
+            out_values[-1] = v
+        else:
+            out_values[-1] = count
+    return out_keys, out_values
+
+
+def _lttb(x, y, threshold: int, np=None) -> list:
+    """
+    Positions of the points kept by Largest-Triangle-Three-Buckets downsampling of points sorted by x.
+    The first and the last point are always kept, every bucket in between keeps the point forming
+    the largest triangle with the previously kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:threshold]
+
+    selected = [0]
+    a = 0
+    buckets = threshold - 2
+    for i in range(buckets):
+        start = i * (n - 2) // buckets + 1
+        end = (i + 1) * (n - 2) // buckets + 1
+        next_end = min((i + 2) * (n - 2) // buckets + 1, n)
+        ax, ay = x[a], y[a]
+        if np is not None:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+            area = np.abs((ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay))
+            a = start + int(area.argmax())
+        else:
+            avg_x = sum(x[end:next_end]) / (next_end - end)
+            avg_y = sum(y[end:next_end]) / (next_end - end)
+            a = max(range(start, end), key=lambda j: abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay)))
+        selected.append(a)
+
+    selected.append(n - 1)
+    return selected
+
+
+def _minmax(y, threshold: int, np=None) -> list:
+    """
+    Positions of the minimum and the maximum of threshold // 2 buckets with the same number of points
+    """
+    n = len(y)
+    if threshold >= n:
+        return list(range(n))
+
+    buckets = max(1, threshold // 2)
+    selected = []
+    for b in range(buckets):
+        start, end = b * n // buckets, (b + 1) * n // buckets
+        if np is not None:
+            low, high = start + int(y[start:end].argmin()), start + int(y[start:end].argmax())
+        else:
+            low = min(range(start, end), key=y.__getitem__)
+            high = max(range(start, end), key=y.__getitem__)
+        selected.extend(sorted({low, high}))
+    return selected
+
 
 class CustomDatetimeConverter(json.JSONEncoder):
     def default(self, obj):
@@ -20,6 +349,62 @@ class CustomDatetimeConverter(json.JSONEncoder):
         return super().default(obj)
 
 
+_ENCODER = CustomDatetimeConverter()
+
+# parallel serialization is not worth starting processes for smaller documents
+_PARALLEL_MIN_RECORDS = 10000
+_PARALLEL_PARTS_PER_WORKER = 2
+# decoded data rows inserted into series at once
+_LOAD_BATCH_ROWS = 1000
+
+
+# JSON backends in order of preference
+_JSON_BACKENDS = ('orjson', 'msgspec', 'ujson', 'json')
+_json_codecs = {}
+
+
+def _json_codec(backend: str = None) -> tuple:
+    """
+    (encode to bytes, decode str or bytes) functions of the JSON backend, the first installed one if not specified
+    """
+    codec = _json_codecs.get(backend)
+    if codec is not None:
+        return codec
+
+    if backend is None:
+        for name in _JSON_BACKENDS:
+            try:
+                codec = _json_codec(name)
+                break
+            except ImportError:
+                continue
+    elif backend not in _JSON_BACKENDS:
+        raise ValueError("'backend' must be one of %s" % ', '.join(_JSON_BACKENDS))
+    elif backend == 'json':
+        codec = (lambda obj: _ENCODER.encode(obj).encode('utf-8'), json.loads)
+    else:
+        try:
+            module = importlib.import_module(backend)
+        except ImportError:
+            raise ImportError("JSON backend '%s' is not installed" % backend) from None
+        if backend == 'orjson':
+            # series indexes are int keys
+            option = module.OPT_NON_STR_KEYS
+            codec = (lambda obj: module.dumps(obj, option=option), module.loads)
+        elif backend == 'msgspec':
+            codec = (module.json.encode, module.json.decode)
+        else:
+            codec = (lambda obj: module.dumps(obj).encode('utf-8'), module.loads)
+
+    _json_codecs[backend] = codec
+    return codec
+
+
+def _encode_data_fragment(jts_doc) -> tuple:
+    # runs in worker processes of JtsDocument.toJSONString(workers=N)
+    return jts_doc._encode_data_fragment()
+
+
 class TsRecord:
     """
     A record of TimeSeries object
@@ -34,6 +419,9 @@ class TsRecord:
     :type annotation: str
     """
 
+    # no per-record __dict__, records are the bulk of memory use of series kept as lists
+    __slots__ = ('timestamp', 'value', 'quality', 'annotation')
+
     def __init__(self, timestamp: datetime, value: Union[float, str, int] = None, quality: int = None,
                  annotation: str = None):
         # TODO 1: enforce value types
@@ -43,6 +431,328 @@ class TsRecord:
         self.annotation = annotation
 
 
+# kinds of values kept in the NUMBER column of ColumnarRecords
+_FLOAT, _INT, _NONE, _OBJECT = 0, 1, 2, 3
+_MAX_EXACT_INT = 2 ** 53
+_KIND_OF_TYPE = {float: _FLOAT, int: _INT, type(None): _NONE}
+_UNSET = object()
+
+
+class ColumnarRecords:
+    pass
+
+
+class ColumnarRecords:
+    """
+    Column-oriented storage of TimeSeries records.
+
+    Timestamps are kept as epoch milliseconds in an ``array('q')``, 'NUMBER' values in an ``array('d')``
+    (other data types in a list) and quality/annotation in sparse dicts keyed by record index.
+    TsRecord objects are only created on access, so changing a returned record does not change the storage.
+    Timestamps are stored with millisecond precision, which is the precision of JTS documents.
+
+    :param data_type: Data type of record values. E.g.: 'NUMBER', 'TEXT', 'TIME', 'COORDINATES'
+    :type data_type: str, optional
+    :param records: Initial records
+    :type records: List[TsRecord], optional
+    """
+
+    def __init__(self, data_type: str = 'NUMBER', records: List[TsRecord] = None):
+        self.data_type = data_type
+        self.timestamps = array('q')
+        self.values = array('d') if data_type == 'NUMBER' else []
+        self.quality = {}
+        self.annotation = {}
+        # timezone of the timestamps. Records in another timezone are kept in self._tz
+        self.tz = _UNSET
+        self._tz = {}
+        # kind of every 'NUMBER' value, allocated when the first non-float value is stored
+        self._kinds = None
+        # 'NUMBER' values which cannot be kept in the float column exactly (e.g. bool, big int)
+        self._objects = {}
+
+        if records is not None:
+            self.extend(records)
+
+    def append(self, record: TsRecord):
+        """
+        Append single record
+        """
+        ts = record.timestamp
+        self._append(_epoch_ms(ts), ts.tzinfo, record.value, record.quality, record.annotation)
+
+    def extend(self, records: List[TsRecord]):
+        """
+        Append multiple records. Nothing is appended if one of them cannot be stored
+        """
+        start = len(self.timestamps)
+        try:
+            for r in records:
+                ts = r.timestamp
+                self._append(_epoch_ms(ts), ts.tzinfo, r.value, r.quality, r.annotation)
+        except Exception:
+            self._truncate(start)
+            raise
+
+    def _append(self, ms: int, tz, value, quality, annotation):
+        if type(self.timestamps) is not array:
+            self._detach()
+        timestamps = self.timestamps
+        i = len(timestamps)
+        # timestamps first: while a column is exported (see TimeSeries.to_numpy()) it cannot grow, and the
+        # failed append has to leave all columns as they were
+        timestamps.append(ms)
+        try:
+            self._append_value(i, value)
+        except (TypeError, BufferError):
+            timestamps.pop()
+            raise
+
+        if self.tz is _UNSET:
+            self.tz = tz
+        elif tz is not self.tz and tz != self.tz:
+            self._tz[i] = tz
+
+        if quality is not None:
+            self.quality[i] = quality
+        if annotation is not None:
+            self.annotation[i] = annotation
+
+    def _extend_columns(self, timestamps, zones: list, values: list, quality: list = None, annotation: list = None):
+        """
+        Append records given column by column: epoch_ms timestamps, their timezones and values, and quality codes
+        and annotations (None for records without) if there are any
+        """
+        if type(self.timestamps) is not array:
+            self._detach()
+        start = len(self.timestamps)
+        # timestamps first, as in _append()
+        self.timestamps.extend(timestamps)
+        try:
+            if self.data_type != 'NUMBER' or (self._kinds is None and all(type(v) is float for v in values)):
+                self.values.extend(values)
+            elif self.__extend_numbers(start, values):
+                pass
+            else:
+                for i, v in enumerate(values, start):
+                    self._append_value(i, v)
+        except (TypeError, BufferError):
+            self._truncate(start)
+            raise
+
+        if zones:
+            if self.tz is _UNSET:
+                self.tz = zones[0]
+            tz = self.tz
+            if zones.count(tz) != len(zones):
+                self._tz.update((i, z) for i, z in enumerate(zones, start) if z is not tz and z != tz)
+        if quality is not None:
+            self.quality.update((i, q) for i, q in enumerate(quality, start) if q is not None)
+        if annotation is not None:
+            self.annotation.update((i, a) for i, a in enumerate(annotation, start) if a is not None)
+
+    def __extend_numbers(self, start: int, values: list) -> bool:
+        # 'NUMBER' values of a batch which are all float, exact int or None. False to append them one by one
+        kinds = [_KIND_OF_TYPE.get(type(v), _OBJECT) for v in values]
+        if _OBJECT in kinds or (_INT in kinds and any(
+                abs(v) > _MAX_EXACT_INT for v, kind in zip(values, kinds) if kind == _INT)):
+            return False
+        nan = float('nan')
+        self.values.extend([nan if v is None else v for v in values] if _NONE in kinds else values)
+        if self._kinds is None:
+            self._kinds = array('b', bytes(start))
+        self._kinds.extend(kinds)
+        return True
+
+    def _append_value(self, i: int, value):
+        if self.data_type != 'NUMBER':
+            self.values.append(value)
+            return
+
+        if isinstance(value, float):
+            kind = _FLOAT
+            self.values.append(value)
+        elif value is None:
+            kind = _NONE
+            self.values.append(float('nan'))
+        elif type(value) is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+            kind = _INT
+            self.values.append(value)
+        elif isinstance(value, int):
+            kind = _OBJECT
+            self.values.append(float('nan'))
+            self._objects[i] = value
+        else:
+            raise TypeError(
+                "TimeSeries with data type 'NUMBER' includes TSRecord with value '%s' which is %s. 'NUMBER' "
+                "values must be int or float" % (value, type(value))
+            )
+
+        if kind != _FLOAT and self._kinds is None:
+            self._kinds = array('b', bytes(i))
+        if self._kinds is not None:
+            self._kinds.append(kind)
+
+    def _value(self, i: int):
+        if self._kinds is None:
+            return self.values[i]
+        kind = self._kinds[i]
+        if kind == _FLOAT:
+            return self.values[i]
+        if kind == _INT:
+            return int(self.values[i])
+        if kind == _NONE:
+            return None
+        return self._objects[i]
+
+    def _timezone(self, i: int):
+        return self._tz.get(i, self.tz)
+
+    def _record(self, i: int) -> TsRecord:
+        return TsRecord(timestamp=_from_epoch_ms(self.timestamps[i], self._timezone(i)),
+                        value=self._value(i),
+                        quality=self.quality.get(i),
+                        annotation=self.annotation.get(i))
+
+    def _iter_points(self, order=None):
+        """
+        Iterate (epoch_ms, tzinfo, value, quality, annotation) tuples without creating TsRecord objects,
+        in storage order or in the given order of record indexes
+        """
+        timestamps = self.timestamps
+        if order is None and self._kinds is None and not self._tz and not self.quality and not self.annotation:
+            tz = self.tz
+            for ms, v in zip(timestamps, self.values):
+                yield ms, tz, v, None, None
+            return
+
+        quality = self.quality
+        annotation = self.annotation
+        for i in range(len(timestamps)) if order is None else order:
+            yield timestamps[i], self._timezone(i), self._value(i), quality.get(i), annotation.get(i)
+
+    def _ordered_points(self):
+        """
+        Sorted epoch_ms keys, an iterator of points in the same order and whether all values are set.
+        Records with equal timestamps keep storage order.
+        """
+        timestamps = self.timestamps
+        if self.data_type == 'NUMBER':
+            complete = self._kinds is None or _NONE not in self._kinds
+        else:
+            complete = None not in self.values
+        if _is_sorted(timestamps):
+            return timestamps, self._iter_points(), complete
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        return array('q', [timestamps[i] for i in order]), self._iter_points(order), complete
+
+    def _sparse_columns(self):
+        return self.quality, self.annotation, self._tz, self._objects
+
+    def _truncate(self, length: int):
+        """
+        Drop records from index length on, e.g. of a batch which could not be stored completely
+        """
+        for column in (self.timestamps, self.values, self._kinds):
+            # columns which did not grow may be exported and cannot be resized at all
+            if column is not None and len(column) > length:
+                del column[length:]
+        for column in self._sparse_columns():
+            for i in [i for i in column if i >= length]:
+                del column[i]
+        if not length:
+            self.tz = _UNSET
+
+    def _detach(self):
+        """
+        Copy columns mapped from a segment file (see json_timeseries.segment) to memory before they are changed
+        """
+        self.timestamps = _copy_column(self.timestamps)
+        if self.data_type == 'NUMBER':
+            self.values = _copy_column(self.values)
+        if self._kinds is not None:
+            self._kinds = _copy_column(self._kinds)
+
+    def _empty_copy(self) -> ColumnarRecords:
+        copy = ColumnarRecords(self.data_type)
+        copy.tz = self.tz
+        return copy
+
+    def _slice(self, start: int, stop: int) -> ColumnarRecords:
+        """
+        Copy of records [start:stop]
+        """
+        copy = self._empty_copy()
+        copy.timestamps = _copy_column(self.timestamps, start, stop)
+        copy.values = _copy_column(self.values, start, stop)
+        if self._kinds is not None:
+            copy._kinds = _copy_column(self._kinds, start, stop)
+        for src, dst in zip(self._sparse_columns(), copy._sparse_columns()):
+            dst.update((i - start, v) for i, v in src.items() if start <= i < stop)
+        return copy
+
+    def _take(self, indices) -> ColumnarRecords:
+        """
+        Copy of records at the given indexes, in that order
+        """
+        copy = self._empty_copy()
+        timestamps = self.timestamps
+        values = self.values
+        copy.timestamps = array('q', [timestamps[i] for i in indices])
+        copy.values = array('d', [values[i] for i in indices]) \
+            if self.data_type == 'NUMBER' else [values[i] for i in indices]
+        if self._kinds is not None:
+            copy._kinds = array('b', [self._kinds[i] for i in indices])
+        for src, dst in zip(self._sparse_columns(), copy._sparse_columns()):
+            if src:
+                dst.update((new, src[old]) for new, old in enumerate(indices) if old in src)
+        return copy
+
+    def _reorder(self, indices):
+        """
+        Reorder records in place
+        """
+        copy = self._take(indices)
+        self.timestamps, self.values, self._kinds = copy.timestamps, copy.values, copy._kinds
+        self.quality, self.annotation, self._tz, self._objects = copy._sparse_columns()
+
+    def _move_last(self, i: int):
+        """
+        Move the last record to index i
+        """
+        if type(self.timestamps) is not array:
+            self._detach()
+        last = len(self) - 1
+        for column in (self.timestamps, self.values, self._kinds):
+            if column is not None:
+                column.insert(i, column.pop())
+        for column in self._sparse_columns():
+            if column:
+                moved = {i if k == last else k + 1 if k >= i else k: v for k, v in column.items()}
+                column.clear()
+                column.update(moved)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._record(i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('record index out of range')
+        return self._record(item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._record(i)
+
+
+class TimeSeries:
+    pass
+
+
 class TimeSeries:
     """
     TimeSeries object
@@ -56,57 +766,872 @@ class TimeSeries:
     :type name: str
     :param identifier: Time series ID. Autogenerated as UUID4 if not specified
     :type identifier: str, optional
+    :param columnar: Keep records in array-backed ColumnarRecords storage instead of a list of TsRecord
+    :type columnar: bool, optional
+    :param validation: When records are checked: 'strict' on creation and insert (and values again on output),
+        'deferred' once per batch of records when the document is built, 'trusted' never.
+        Columnar storage always checks values when records are stored
+    :type validation: str, optional
+    :default validation: 'strict'
+    :raise [TypeError]: [Records are not TsRecord or 'NUMBER' values are not int or float]
     """
 
+    # number of ids and names changed after construction, so that JtsDocument indexes of series can tell
+    # when they are outdated
+    _renames = 0
+
     def __init__(self, name: str, units: str = None, identifier: str = str(uuid.uuid4()),
                  data_type: str = 'NUMBER',
-                 records: Union[List[TsRecord], TsRecord] = None):
-        self.identifier = identifier
-        self.name = name
+                 records: Union[List[TsRecord], TsRecord, ColumnarRecords] = None,
+                 columnar: bool = False, validation: str = 'strict'):
+        if validation not in _VALIDATION_MODES:
+            raise ValueError("'validation' must be one of %s" % ', '.join(_VALIDATION_MODES))
+        self._identifier = identifier
+        self._name = name
         self.units = units
         self.data_type = data_type
+        self.validation = validation
+        # batches of records inserted in 'deferred' mode and not checked yet
+        self._pending = []
+        # (records, epoch_ms keys, length, is sorted) maintained by insert() and sort()
+        self._index = None
+        # number of changes other than appending records at the end, see JtsDocument(incremental=True)
+        self._edits = 0
+        # records shared with clones, copied before they are changed
+        self._shared = None
+
+        if isinstance(records, ColumnarRecords):
+            self.records = records
+            return
 
         if records is None:
-            self.records = []
+            records = []
         elif isinstance(records, TsRecord):
-            self.records = [records]
-        elif isinstance(records, list) and all(isinstance(x, TsRecord) for x in records):
-            self.records = records
-        else:
+            records = [records]
+        elif not isinstance(records, list):
             raise TypeError("'records' value must be TsRecord or List[TsRecord]")
 
-        for r in self.records:
+        if columnar:
+            # value types are checked by the storage itself
+            if validation != 'trusted':
+                _check_records(records)
+            self.records = ColumnarRecords(data_type, records)
+            return
 
-            if (r.value is not None) and not (isinstance(r.value, (float, int))) and (self.data_type == 'NUMBER'):
-                raise TypeError(
-                    "TimeSeries with data type 'NUMBER' includes TSRecord with value '%s' which is %s. 'NUMBER' "
-                    "values must be int or float" % (r.value, type(r.value))
-                )
+        self.records = records
+        self._accept(records)
 
     # def __eq__(self, other):
     #     return self.__dict__ is other.__dict__
 
     def insert(self, records: Union[TsRecord, List[TsRecord]]):
         """
-        Insert single or multiple records
+        Insert single or multiple records.
+        Records of a sorted series are inserted in time order, after records with equal timestamps.
+        Records of an unsorted series are appended.
+
+        :raise [TypeError]: [Records are not TsRecord or 'NUMBER' values are not int or float, in 'strict' mode]
+        """
+        if records.__class__ is TsRecord and self._append_one(records):
+            return
+
+        self._own_records()
+        keys, is_sorted, length = self._time_index()
+        store = self.records
+        columnar = isinstance(store, ColumnarRecords)
+        if columnar:
+            if self.validation != 'trusted':
+                _check_records(records if isinstance(records, list) else [records])
+        else:
+            self._accept(records if isinstance(records, list) else [records])
+
+        if not isinstance(records, list):
+            ms = _epoch_ms(records.timestamp)
+            # in-order insertion
+            i = bisect.bisect_right(keys, ms)
+            if columnar:
+                store.append(records)
+                store._move_last(i)
+                keys = store.timestamps
+            else:
+                store.insert(i, records)
+                keys.insert(i, ms)
+            self._index = (store, keys, length + 1, True)
+            self._edits += 1
+            return
+
+        if columnar:
+            store.extend(records)
+            keys = store.timestamps
+            new_keys = keys[length:]
+        else:
+            new_keys = _epoch_ms_array([r.timestamp for r in records])
+            store.extend(records)
+            keys.extend(new_keys)
+
+        still_sorted = is_sorted and (not length or not new_keys or new_keys[0] >= keys[length - 1]) \
+            and _is_sorted(new_keys)
+        self._index = (store, keys, len(store), still_sorted)
+        if is_sorted and not still_sorted:
+            self.sort()
+
+    def _append_one(self, record: TsRecord) -> bool:
+        """
+        Fast path of insert() for a record appended at the end, the common case of records coming in time order.
+        False if the record has to go through insert()
         """
+        store = self.records
+        index = self._index
+        if index is None or index[0] is not store or index[2] != len(store) or store is self._shared \
+                or self.validation == 'deferred':
+            return False
+        columnar = store.__class__ is ColumnarRecords
+        if self.validation == 'strict' and not columnar and self.data_type == 'NUMBER':
+            v = record.value
+            if v is not None and v.__class__ is not float and v.__class__ is not int:
+                _check_records([record], self.data_type)
+
+        _, keys, length, is_sorted = index
+        ms = _epoch_ms(record.timestamp)
+        if is_sorted and length and ms < keys[-1]:
+            return False
+        store.append(record)
+        if columnar:
+            keys = store.timestamps
+        else:
+            keys.append(ms)
+        self._index = (store, keys, length + 1, is_sorted)
+        return True
 
-        if isinstance(records, list):
-            self.records.extend(records)
-        # single instance
+    def validate(self):
+        """
+        Check all records now, whatever the validation mode
+
+        :raise [TypeError]: [Records are not TsRecord or 'NUMBER' values are not int or float]
+        """
+        if not isinstance(self.records, ColumnarRecords):
+            _check_records(self.records, self.data_type)
+        self._pending.clear()
+
+    def _accept(self, records: list):
+        """
+        Check records about to be added to a list storage as the validation mode requires
+        """
+        if self.validation == 'strict':
+            _check_records(records, self.data_type)
+        elif self.validation == 'deferred' and records:
+            self._pending.append(records)
+
+    def _check_pending(self):
+        """
+        Check batches of records inserted in 'deferred' mode.
+        After a failure all records stay pending, so that fixing them in place is enough.
+        """
+        pending = self._pending
+        try:
+            for records in pending:
+                _check_records(records, self.data_type)
+            pending.clear()
+        except TypeError:
+            pending[:] = [self.records]
+            raise
+
+    def _like(self, records) -> TimeSeries:
+        """
+        TimeSeries with the same properties and validation mode, and records taken from this one
+        """
+        ts = TimeSeries(name=self.name, units=self.units, identifier=self.identifier, data_type=self.data_type,
+                        records=records, validation='trusted')
+        ts.validation = self.validation
+        if self._pending and not isinstance(records, ColumnarRecords):
+            ts._pending.append(records)
+        return ts
+
+    def sort(self) -> TimeSeries:
+        """
+        Sort records by timestamp in place. Records with equal timestamps keep their order.
+
+        :return: The sorted TimeSeries itself
+        :rtype: TimeSeries
+        """
+        store = self.records
+        if isinstance(store, ColumnarRecords):
+            keys = store.timestamps
+        else:
+            keys = _epoch_ms_array([r.timestamp for r in store])
+
+        if not _is_sorted(keys):
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._own_records()
+            store = self.records
+            if isinstance(store, ColumnarRecords):
+                store._reorder(order)
+                keys = store.timestamps
+            else:
+                store[:] = [store[i] for i in order]
+                keys = array('q', [keys[i] for i in order])
+            self._edits += 1
+
+        self._index = (store, keys, len(store), True)
+        return self
+
+    @property
+    def is_sorted(self) -> bool:
+        """
+        True if records are in time order
+        """
+        return self._time_index()[1]
+
+    def slice(self, start: datetime = None, end: datetime = None) -> TimeSeries:
+        """
+        Records from start (inclusive) to end (exclusive) as new TimeSeries with the same properties.
+        Logarithmic time lookup on sorted series.
+
+        :param start: Start time. From the first record if not specified
+        :type start: datetime, optional
+        :param end: End time. Up to the last record if not specified
+        :type end: datetime, optional
+        :rtype: TimeSeries
+        """
+        return self._slice_ms(_epoch_ms(start) if start is not None else None,
+                              _epoch_ms(end) if end is not None else None)
+
+    def _slice_ms(self, start_ms: int = None, end_ms: int = None) -> TimeSeries:
+        keys, is_sorted, length = self._time_index()
+        store = self.records
+
+        if is_sorted:
+            lo = bisect.bisect_left(keys, start_ms) if start_ms is not None else 0
+            hi = bisect.bisect_left(keys, end_ms) if end_ms is not None else length
+            hi = max(lo, hi)
+            records = store._slice(lo, hi) if isinstance(store, ColumnarRecords) else store[lo:hi]
+        else:
+            indices = [i for i, ms in enumerate(keys)
+                       if (start_ms is None or ms >= start_ms) and (end_ms is None or ms < end_ms)]
+            records = store._take(indices) if isinstance(store, ColumnarRecords) else [store[i] for i in indices]
+
+        return self._like(records)
+
+    def _as_columnar(self) -> TimeSeries:
+        """
+        This series with columnar storage, which is pickled as a few arrays instead of one object per record
+        """
+        if isinstance(self.records, ColumnarRecords):
+            return self
+        try:
+            return self._like(ColumnarRecords(self.data_type, self.records))
+        except TypeError:
+            # values the columnar storage cannot keep, inserted in 'trusted' mode
+            return self
+
+    def _has_non_finite(self) -> bool:
+        """
+        True if a record value is a NaN or infinite float
+        """
+        store = self.records
+        if isinstance(store, ColumnarRecords) and store.data_type == 'NUMBER':
+            values = store.values
+            # the sum is finite unless a value is not (None is kept as NaN) or the sum overflows
+            if math.isfinite(sum(values)):
+                return False
+            kinds = store._kinds
+            return any(not math.isfinite(v) and (kinds is None or kinds[i] == _FLOAT) for i, v in enumerate(values))
+
+        values = store.values if isinstance(store, ColumnarRecords) else (r.value for r in store)
+        return any(v.__class__ is float and not math.isfinite(v) for v in values)
+
+    def at(self, timestamp: datetime) -> Union[TsRecord, None]:
+        """
+        Record at the timestamp (with millisecond precision), the last one if there are several.
+        Logarithmic time lookup on sorted series.
+
+        :rtype: TsRecord or None
+        """
+        keys, is_sorted, length = self._time_index()
+        ms = _epoch_ms(timestamp)
+        if is_sorted:
+            i = bisect.bisect_right(keys, ms) - 1
+            found = i >= 0 and keys[i] == ms
         else:
-            self.records.append(records)
+            i = next((i for i in range(length - 1, -1, -1) if keys[i] == ms), -1)
+            found = i >= 0
+        return self.records[i] if found else None
+
+    def first(self) -> Union[TsRecord, None]:
+        """
+        Earliest record
+
+        :rtype: TsRecord or None
+        """
+        keys, is_sorted, length = self._time_index()
+        if not length:
+            return None
+        return self.records[0 if is_sorted else min(range(length), key=keys.__getitem__)]
+
+    def last(self) -> Union[TsRecord, None]:
+        """
+        Latest record, the last inserted one if there are several
+
+        :rtype: TsRecord or None
+        """
+        keys, is_sorted, length = self._time_index()
+        if not length:
+            return None
+        if is_sorted:
+            return self.records[-1]
+        latest = max(keys)
+        return self.records[next(i for i in range(length - 1, -1, -1) if keys[i] == latest)]
+
+    def merge(self, other: TimeSeries, on_conflict: str = 'keep_last') -> TimeSeries:
+        """
+        Merge records of the other series into this one in time order, in place.
+        Of records with equal timestamps (with millisecond precision) only one is kept, including duplicates
+        which were already in one of the series. Sorted series are merged in a single linear pass.
+
+        :param other: Series to merge, not changed
+        :type other: TimeSeries
+        :param on_conflict: Record kept of records with equal timestamps: 'keep_last' (the one of the other
+            series, or the later one of the same series), 'keep_first', or 'error' to raise ValueError when
+            their values, quality codes or annotations differ
+        :type on_conflict: str, optional
+        :default on_conflict: 'keep_last'
+        :return: The merged TimeSeries itself
+        :rtype: TimeSeries
+        :raise [ValueError]: [Different data types, or conflicting records with on_conflict 'error']
+        :raise [TypeError]: [Records of the other series are not valid, in 'strict' mode]
+        """
+        self._replace_records(self._merged(other, on_conflict))
+        return self
+
+    def _merged(self, other: TimeSeries, on_conflict: str) -> TimeSeries:
+        """
+        Sorted and deduplicated union of records of both series as new TimeSeries like this one
+        """
+        if on_conflict not in _MERGE_CONFLICTS:
+            raise ValueError("'on_conflict' must be one of %s" % ', '.join(_MERGE_CONFLICTS))
+        if other.data_type != self.data_type:
+            raise ValueError("Cannot merge series '%s' of data type '%s' into series of data type '%s'"
+                             % (other.identifier, other.data_type, self.data_type))
+
+        sources = []
+        for ts in (self, other):
+            keys, is_sorted, length = ts._time_index()
+            order = range(length) if is_sorted else sorted(range(length), key=keys.__getitem__)
+            sources.append((ts.records, keys, order, length))
+        (store_a, keys_a, order_a, len_a), (store_b, keys_b, order_b, len_b) = sources
+
+        # two-way merge of (store, record index) in time order, records of this series first on equal timestamps
+        keys = array('q')
+        picked = []
+        i = j = 0
+        while i < len_a or j < len_b:
+            if j == len_b or (i < len_a and keys_a[order_a[i]] <= keys_b[order_b[j]]):
+                store, k = store_a, order_a[i]
+                ms = keys_a[k]
+                i += 1
+            else:
+                store, k = store_b, order_b[j]
+                ms = keys_b[k]
+                j += 1
+
+            if picked and keys[-1] == ms:
+                if on_conflict == 'keep_last':
+                    picked[-1] = (store, k)
+                elif on_conflict == 'error' and _record_fields(*picked[-1]) != _record_fields(store, k):
+                    raise ValueError("Conflicting records of series '%s' at %s"
+                                     % (self.identifier, _format_ms(ms, _record_tz(store, k))))
+                continue
+            keys.append(ms)
+            picked.append((store, k))
+
+        if isinstance(store_a, ColumnarRecords):
+            records = store_a._empty_copy()
+            for store, k in picked:
+                if isinstance(store, ColumnarRecords):
+                    records._append(store.timestamps[k], store._timezone(k), store._value(k),
+                                    store.quality.get(k), store.annotation.get(k))
+                else:
+                    records.append(store[k])
+            keys = records.timestamps
+        else:
+            records = [store[k] for store, k in picked]
+            if self.validation == 'strict' and other.validation != 'strict' \
+                    and not isinstance(store_b, ColumnarRecords):
+                _check_records([store[k] for store, k in picked if store is store_b], self.data_type)
+
+        merged = self._like(records)
+        if other._pending and not merged._pending and not isinstance(records, ColumnarRecords):
+            merged._pending.append(records)
+        merged._index = (records, keys, len(records), True)
+        return merged
+
+    def _replace_records(self, ts: TimeSeries):
+        """
+        Take over records of a TimeSeries derived from this one
+        """
+        self.records = ts.records
+        self._index = ts._index
+        self._pending = ts._pending
+        self._edits += 1
+
+    def resample(self, interval: timedelta, agg: str = 'mean', origin: datetime = None) -> TimeSeries:
+        """
+        Aggregate records into fixed time intervals, e.g. one minute means.
+        Intervals start at origin plus multiples of interval and records are timestamped with their start.
+        Empty intervals are left out, records without value are ignored, quality and annotations are dropped.
+        Aggregated 'NUMBER' values are floats, counts are int. Runs in one pass over sorted records,
+        vectorized with NumPy when it is installed.
+
+        :param interval: Length of the intervals, at least one millisecond
+        :type interval: timedelta
+        :param agg: Aggregation: 'mean', 'min', 'max', 'last' or 'count'
+        :type agg: str, optional
+        :param origin: Start of one of the intervals. The Unix epoch if not specified
+        :type origin: datetime, optional
+        :rtype: TimeSeries
+        :raise [ValueError]: [Unknown aggregation or interval shorter than one millisecond]
+        :raise [TypeError]: ['mean', 'min' and 'max' of series other than 'NUMBER']
+        """
+        if agg not in _AGGREGATES:
+            raise ValueError("'agg' must be one of %s" % ', '.join(_AGGREGATES))
+        step = interval // _ONE_MS
+        if step < 1:
+            raise ValueError("'interval' must be at least one millisecond")
+        if agg in ('mean', 'min', 'max') and self.data_type != 'NUMBER':
+            raise TypeError("Only 'NUMBER' time series can be aggregated with '%s'" % agg)
+
+        np = _optional_numpy() if self.data_type == 'NUMBER' else None
+        keys, values, _ = self._valued_points(np)
+        keys, values = _resample(keys, values, step, _epoch_ms(origin) if origin is not None else 0, agg, np)
+        return self._derived(keys, values, 'NUMBER' if agg == 'count' else self.data_type)
+
+    def downsample(self, max_points: int, method: str = 'lttb') -> TimeSeries:
+        """
+        Reduce the number of records to at most max_points, keeping the visual shape of the series.
+        Kept records are unchanged, records without value are left out.
+        Vectorized with NumPy when it is installed.
+
+        :param max_points: Maximum number of records, at least 2
+        :type max_points: int
+        :param method: 'lttb' for Largest-Triangle-Three-Buckets, 'minmax' for minimum and maximum
+            of max_points / 2 intervals with the same number of records
+        :type method: str, optional
+        :rtype: TimeSeries
+        :raise [ValueError]: [Unknown method or max_points smaller than 2]
+        :raise [TypeError]: [Series other than 'NUMBER']
+        """
+        if method not in ('lttb', 'minmax'):
+            raise ValueError("'method' must be 'lttb' or 'minmax'")
+        if max_points < 2:
+            raise ValueError("'max_points' must be at least 2")
+        if self.data_type != 'NUMBER':
+            raise TypeError("Only 'NUMBER' time series can be downsampled")
+
+        np = _optional_numpy()
+        keys, values, indexes = self._valued_points(np)
+        if method == 'minmax':
+            selected = _minmax(values, max_points, np)
+        elif np is not None:
+            selected = _lttb((keys - keys[:1]).astype(np.float64), values, max_points, np)
+        else:
+            selected = _lttb([ms - keys[0] for ms in keys], values, max_points)
+
+        indexes = indexes[selected].tolist() if np is not None else [indexes[i] for i in selected]
+        store = self.records
+        records = store._take(indexes) if isinstance(store, ColumnarRecords) else [store[i] for i in indexes]
+        return self._like(records)
+
+    def _valued_points(self, np=None) -> tuple:
+        """
+        Epoch_ms keys, values and storage indexes of records with value (not None or NaN) in time order.
+        'NUMBER' values are floats. NumPy arrays if np is given, which requires a 'NUMBER' series.
+        """
+        if self._pending:
+            self._check_pending()
+        keys, is_sorted, length = self._time_index()
+        store = self.records
+
+        if np is not None:
+            keys = np.array(keys, dtype=np.int64)
+            values = self.to_numpy(copy=True)[1]
+            indexes = np.arange(length)
+            if not is_sorted:
+                indexes = np.argsort(keys, kind='stable')
+                keys, values = keys[indexes], values[indexes]
+            valued = ~np.isnan(values)
+            return keys[valued], values[valued], indexes[valued]
+
+        value = store._value if isinstance(store, ColumnarRecords) else lambda i: store[i].value
+        number = self.data_type == 'NUMBER'
+        valued_keys, values, indexes = [], [], []
+        for i in range(length) if is_sorted else sorted(range(length), key=keys.__getitem__):
+            v = value(i)
+            if v is None or v != v:
+                continue
+            valued_keys.append(keys[i])
+            values.append(float(v) if number else v)
+            indexes.append(i)
+        return valued_keys, values, indexes
+
+    def _derived(self, keys, values, data_type: str) -> TimeSeries:
+        """
+        TimeSeries with the same properties and storage kind, and records of the keys and values
+        in the timezone of the first record
+        """
+        first = self.first()
+        tz = first.timestamp.tzinfo if first is not None else None
+        store = ColumnarRecords(data_type)
+        for ms, v in zip(keys, values):
+            store._append(ms, tz, v, None, None)
+        return TimeSeries(name=self.name, units=self.units, identifier=self.identifier, data_type=data_type,
+                          records=store if isinstance(self.records, ColumnarRecords) else list(store))
+
+    def _time_index(self):
+        """
+        Epoch_ms keys of records in storage order, whether they are sorted, and number of records.
+        Rebuilt when records were replaced or their number changed outside of insert().
+        """
+        store = self.records
+        index = self._index
+        if index is None or index[0] is not store or index[2] != len(store):
+            if isinstance(store, ColumnarRecords):
+                keys = store.timestamps
+            else:
+                keys = _epoch_ms_array([r.timestamp for r in store])
+            index = self._index = (store, keys, len(store), _is_sorted(keys))
+        return index[1], index[3], index[2]
+
+    def to_numpy(self, copy: bool = False) -> tuple:
+        """
+        Records as NumPy arrays. Requires numpy (``pip install json-timeseries[numpy]``).
+
+        Timestamps are UTC ``datetime64[ms]``, naive timestamps keep their wall-clock time.
+        'NUMBER' values are float64 with NaN for missing values, values of other data types are object arrays.
+        Quality is float64 with NaN for missing quality, or None if no record has quality. Annotations are not included.
+
+        For columnar series, timestamps and values are views on the storage unless copy is True.
+        Records cannot be inserted while such views exist.
+
+        :param copy: Always return copies of the storage
+        :type copy: bool, optional
+        :return: Tuple of (timestamps, values, quality)
+        :rtype: tuple
+        """
+        np = _import_optional('numpy', 'numpy')
+        store = self.records
+
+        if isinstance(store, ColumnarRecords):
+            n = len(store)
+            timestamps = np.frombuffer(store.timestamps, dtype=np.int64) if n else np.empty(0, np.int64)
+            if store.data_type != 'NUMBER':
+                values = np.array(store.values, dtype=object)
+            elif store._kinds is None:
+                values = np.frombuffer(store.values, dtype=np.float64) if n else np.empty(0, np.float64)
+            else:
+                values = np.array(store.values, dtype=np.float64)
+                for i, v in store._objects.items():
+                    values[i] = float(v)
+            if copy:
+                timestamps = timestamps.copy()
+                values = values.copy()
+            quality = None
+            if store.quality:
+                quality = np.full(n, np.nan)
+                quality[list(store.quality)] = list(store.quality.values())
+        else:
+            timestamps = np.frombuffer(_epoch_ms_array([r.timestamp for r in store]), dtype=np.int64).copy()
+            if self.data_type == 'NUMBER':
+                values = np.array([np.nan if r.value is None else float(r.value) for r in store], dtype=np.float64)
+            else:
+                values = np.array([r.value for r in store], dtype=object)
+            quality = None
+            if any(r.quality is not None for r in store):
+                quality = np.array([np.nan if r.quality is None else r.quality for r in store], dtype=np.float64)
+
+        return timestamps.view('datetime64[ms]'), values, quality
+
+    @staticmethod
+    def from_numpy(timestamps, values, quality=None, name: str = None, units: str = None, identifier: str = None,
+                   data_type: str = 'NUMBER', tz=timezone.utc) -> TimeSeries:
+        """
+        Create columnar TimeSeries from NumPy arrays without creating TsRecord objects.
+        Requires numpy (``pip install json-timeseries[numpy]``).
+
+        :param timestamps: ``datetime64`` array (UTC) or int array of epoch milliseconds
+        :param values: Values. For 'NUMBER', an int or float array with NaN for missing values
+        :param quality: Quality codes, float array with NaN for missing quality, optional
+        :param name: Time series name
+        :type name: str, optional
+        :param units: Units
+        :type units: str, optional
+        :param identifier: Time series ID. Autogenerated as UUID4 if not specified
+        :type identifier: str, optional
+        :param data_type: Type of time series
+        :type data_type: str, optional
+        :param tz: Timezone of the record timestamps
+        :type tz: tzinfo, optional
+        :rtype: TimeSeries
+        :raise [ValueError]: [Arrays have different lengths]
+        :raise [TypeError]: ['NUMBER' values are not int or float]
+        """
+        np = _import_optional('numpy', 'numpy')
+
+        timestamps = np.asarray(timestamps)
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').view(np.int64)
+        timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        values = np.asarray(values)
+        n = len(timestamps)
+        if len(values) != n or (quality is not None and len(quality) != n):
+            raise ValueError("'timestamps', 'values' and 'quality' must have the same length")
+
+        store = ColumnarRecords(data_type)
+        store.tz = tz
+        store.timestamps.frombytes(timestamps.view(np.uint8))
+
+        if data_type != 'NUMBER' or values.dtype == object:
+            for i, v in enumerate(values.tolist()):
+                store._append_value(i, None if isinstance(v, float) and v != v else v)
+        elif np.issubdtype(values.dtype, np.floating):
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            store.values.frombytes(values.view(np.uint8))
+            missing = np.isnan(values)
+            if missing.any():
+                store._kinds = array('b', (missing.astype(np.int8) * _NONE).tobytes())
+        elif np.issubdtype(values.dtype, np.integer):
+            store.values.frombytes(values.astype(np.float64).view(np.uint8))
+            kinds = np.full(n, _INT, dtype=np.int8)
+            inexact = np.flatnonzero(np.abs(values) > _MAX_EXACT_INT) if n else []
+            for i in inexact:
+                kinds[i] = _OBJECT
+                store._objects[int(i)] = int(values[i])
+            store._kinds = array('b', kinds.tobytes())
+        else:
+            raise TypeError("Value of Data Type 'NUMBER' must be float or int")
+
+        if quality is not None:
+            quality = np.asarray(quality)
+            present = np.flatnonzero(~np.isnan(quality)) if np.issubdtype(quality.dtype, np.floating) \
+                else np.arange(n)
+            store.quality.update(zip(present.tolist(), quality[present].astype(np.int64).tolist()))
+
+        return TimeSeries(name=name, units=units, identifier=identifier or str(uuid.uuid4()), data_type=data_type,
+                          records=store)
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary encoding of the series, see json_timeseries.binary.
+        Timestamps are kept with millisecond precision.
+
+        :rtype: bytes
+        :raise [ValueError]: [Timezone which is neither a fixed offset nor a zoneinfo timezone]
+        """
+        from json_timeseries import binary
+        return binary.encode_series(self)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> TimeSeries:
+        """
+        Decode columnar TimeSeries from to_bytes() output
+
+        :rtype: TimeSeries
+        :raise [ValueError]: [Invalid or truncated data]
+        """
+        from json_timeseries import binary
+        return binary.decode_series(data)
+
+    def to_segment(self, path: str):
+        """
+        Write the series as an on-disk segment which can be opened with mmap, see json_timeseries.segment.
+        Records can be added to the segment later with json_timeseries.segment.append_segment().
+
+        :param path: Segment directory, replaced if it exists
+        :type path: str
+        """
+        from json_timeseries import segment
+        segment.write_segment(self, path)
+
+    @staticmethod
+    def from_segment(path: str) -> TimeSeries:
+        """
+        Open an on-disk segment as columnar TimeSeries with memory-mapped timestamps and values.
+        Only the parts that are used are read from disk.
+
+        :param path: Segment directory
+        :type path: str
+        :rtype: TimeSeries
+        """
+        from json_timeseries import segment
+        return segment.open_segment(path)
+
+    @staticmethod
+    def from_csv(source, value: str = 'value', timestamp: str = 'timestamp', quality: str = None,
+                 annotation: str = None, name: str = None, units: str = None, identifier: str = None,
+                 data_type: str = 'NUMBER', **options) -> TimeSeries:
+        """
+        Read a series from CSV columns straight into columnar storage, batch by batch.
+        See json_timeseries.ingest.read_csv() for the other options, e.g. timestamp_format and tz.
+
+        :param source: Path, or text or binary file-like object
+        :param value: Name of the value column
+        :type value: str, optional
+        :param timestamp: Name of the timestamp column
+        :type timestamp: str, optional
+        :param quality: Name of the quality column
+        :type quality: str, optional
+        :param annotation: Name of the annotation column
+        :type annotation: str, optional
+        :param name: Time series name, the value column name if not specified
+        :type name: str, optional
+        :param identifier: Time series ID, the value column name if not specified
+        :type identifier: str, optional
+        :rtype: TimeSeries
+        :raise [ValueError]: [Missing columns, invalid rows, timestamps or values]
+        """
+        from json_timeseries import ingest
+        return TimeSeries.__ingested(ingest.read_csv, source, value, timestamp, quality, annotation, name, units,
+                                     identifier, data_type, options)
 
-    # def sort(self):
-    #     pass
-    #
-    # def clone(self):
-    #     # ITimeSeries<Type>;
-    #     pass
+    @staticmethod
+    def from_ndjson(source, value: str = 'value', timestamp: str = 'timestamp', quality: str = None,
+                    annotation: str = None, name: str = None, units: str = None, identifier: str = None,
+                    data_type: str = 'NUMBER', **options) -> TimeSeries:
+        """
+        Read a series from NDJSON, a JSON object per line, straight into columnar storage, batch by batch.
+        See from_csv() and json_timeseries.ingest.read_ndjson()
+
+        :rtype: TimeSeries
+        :raise [ValueError]: [Missing or invalid timestamps, invalid JSON or quality codes]
+        :raise [TypeError]: ['NUMBER' values are not int or float]
+        """
+        from json_timeseries import ingest
+        return TimeSeries.__ingested(ingest.read_ndjson, source, value, timestamp, quality, annotation, name, units,
+                                     identifier, data_type, options)
+
+    @staticmethod
+    def __ingested(read, source, value, timestamp, quality, annotation, name, units, identifier, data_type,
+                   options: dict) -> TimeSeries:
+        jts_doc = read(source, timestamp=timestamp, columns=[value],
+                       quality={value: quality} if quality is not None else None,
+                       annotation={value: annotation} if annotation is not None else None,
+                       data_types={value: data_type}, units={value: units}, **options)
+        ts = jts_doc.series[0]
+        if name is not None:
+            ts.name = name
+        if identifier is not None:
+            ts.identifier = identifier
+        return ts
+
+    def clone(self) -> TimeSeries:
+        """
+        Copy of the series in constant time. Both series share their records until either of them changes
+        them with insert() or sort(), which copies them first (copy-on-write). Properties such as name
+        are not shared.
+        Records changed directly, e.g. by ``ts.records.append()`` or by setting attributes of a TsRecord,
+        change both series.
+
+        :rtype: TimeSeries
+        """
+        store = self.records
+        ts = self._like(store)
+        ts._pending = list(self._pending)
+        index = self._index
+        if index is not None and index[0] is store:
+            ts._index = index
+        self._shared = ts._shared = store
+        return ts
+
+    def _own_records(self):
+        """
+        Copy records shared with clones before they are changed
+        """
+        store = self.records
+        if self._shared is not store:
+            return
+        self._shared = None
+        copy = store._slice(0, len(store)) if isinstance(store, ColumnarRecords) else list(store)
+        index = self._index
+        if index is not None and index[0] is store and index[2] == len(store):
+            keys = copy.timestamps if isinstance(copy, ColumnarRecords) else array('q', index[1])
+            self._index = (copy, keys, index[2], index[3])
+        else:
+            self._index = None
+        self.records = copy
 
     def __len__(self):
         return self.records.__len__()
 
+    @property
+    def identifier(self) -> str:
+        """
+        Time series ID
+        """
+        return self._identifier
+
+    @identifier.setter
+    def identifier(self, identifier: str):
+        self._identifier = identifier
+        TimeSeries._renames += 1
+
+    @property
+    def name(self) -> str:
+        """
+        Time series name
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        self._name = name
+        TimeSeries._renames += 1
+
+    @property
+    def columnar(self) -> bool:
+        """
+        True if records are kept in ColumnarRecords storage
+        """
+        return isinstance(self.records, ColumnarRecords)
+
+    def _iter_points(self):
+        """
+        Iterate records as (epoch_ms, tzinfo, value, quality, annotation) tuples
+        """
+        records = self.records
+        if isinstance(records, ColumnarRecords):
+            return records._iter_points()
+        return ((_epoch_ms(r.timestamp), r.timestamp.tzinfo, r.value, r.quality, r.annotation)
+                for r in records)
+
+    def _ordered_points(self, known: list = None):
+        """
+        Sorted epoch_ms keys, an iterator of (epoch_ms, tzinfo, value, quality, annotation) in the same order and
+        whether all values are set. Records with equal timestamps keep insertion order, so the last one still wins
+        in the document.
+        known is [timestamps, epoch_ms keys] of the previous series, reused if the timestamps are equal (series
+        of the same time axis) and updated otherwise
+        """
+        records = self.records
+        if isinstance(records, ColumnarRecords):
+            return records._ordered_points()
+
+        timestamps = [r.timestamp for r in records]
+        if known is not None and known[0] == timestamps:
+            # comparing datetimes is much faster than converting them
+            keys = known[1]
+        else:
+            keys = _epoch_ms_array(timestamps)
+            if known is not None:
+                known[:] = timestamps, keys
+        if not _is_sorted(keys):
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            keys = array('q', [keys[i] for i in order])
+            records = [records[i] for i in order]
+            timestamps = [timestamps[i] for i in order]
+        values = [r.value for r in records]
+        # zipped columns, which are built faster than a tuple per record
+        return keys, zip(keys, [dt.tzinfo for dt in timestamps], values, [r.quality for r in records],
+                         [r.annotation for r in records]), None not in values
+
     def toJSON(self) -> str:
         """
         Outputs formatted JSON
@@ -120,13 +1645,248 @@ class TimeSeries:
 #
 #   public sort (): TimeSeries<Type> {
 #
-#   public clone (): TimeSeries<Type> {
-#
 #   private recordToJSON (record: ITimeSeriesRecord<Type>): ITimeSeriesRecordJson<Type> {
 #
 #   private valueToJSON (value: Type | undefined): Type | undefined | string | null {
-#
-#   private cloneRecords (records: ITimeSeriesRecord<Type>[]): ITimeSeriesRecord<Type>[] {
+
+
+class JtsReader:
+    """
+    Incremental reader of JTS documents.
+
+    Reads a document from a text or binary file-like object chunk by chunk, or from data passed to feed(),
+    and decodes data rows one at a time, so memory use does not grow with the document size.
+    Top level values such as 'header' are available as soon as they have been read.
+
+    :param fp: Text or binary file-like object with read() method, optional when data is passed to feed()
+    :param chunk_size: Number of characters or bytes read at once
+    :type chunk_size: int, optional
+    :raise [ValueError]: [Invalid JTS document]
+    """
+
+    # parser states
+    _START, _KEY, _COLON, _VALUE, _NEXT_KEY, _DATA_START, _DATA_ROW, _NEXT_ROW, _END = range(9)
+
+    def __init__(self, fp=None, chunk_size: int = 65536):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.doc_type = None
+        self.version = None
+        self.header = None
+
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = None
+        self._buffer = ''
+        self._state = self._START
+        self._key = None
+        self._closed = False
+
+    @property
+    def columns(self) -> dict:
+        """
+        Header columns, once the header has been read
+        """
+        return self.header.get('columns') if self.header else None
+
+    def feed(self, data: Union[str, bytes]) -> list:
+        """
+        Feed next part of the document
+
+        :param data: Next part of the document. Bytes are decoded as UTF-8
+        :type data: Union[str, bytes]
+        :return: Data rows completed by this part, as decoded dicts
+        :rtype: list
+        """
+        if isinstance(data, bytes):
+            if self._text_decoder is None:
+                self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+            data = self._text_decoder.decode(data)
+        self._buffer += data
+        return self._parse()
+
+    def close(self) -> list:
+        """
+        Signal the end of the document
+
+        :return: Data rows completed by the end of the document
+        :rtype: list
+        :raise [ValueError]: [Document is incomplete]
+        """
+        if self._text_decoder is not None:
+            self._buffer += self._text_decoder.decode(b'', final=True)
+        self._closed = True
+        rows = self._parse()
+        if self._state != self._END:
+            raise ValueError("Incomplete JTS document")
+        return rows
+
+    def __iter__(self):
+        """
+        Iterate data rows of the document read from fp as decoded dicts
+        """
+        while True:
+            chunk = self.fp.read(self.chunk_size)
+            if not chunk:
+                break
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def iter_records(self):
+        """
+        Iterate records of the document read from fp
+
+        :return: Iterator of (column index, TsRecord)
+        :rtype: Iterator[tuple]
+        """
+        for row in self:
+            ts = _parse_timestamp(row["ts"])
+            for i, r in row["f"].items():
+                yield int(i), TsRecord(timestamp=ts, value=r.get('v'), quality=r.get('q'), annotation=r.get('a'))
+
+    def _parse(self) -> list:
+        rows = []
+        buf = self._buffer
+        pos = 0
+        end = len(buf)
+        while True:
+            # skip whitespace
+            while pos < end and buf[pos] in ' \t\n\r':
+                pos += 1
+            if pos == end:
+                if self._closed and self._state != self._END:
+                    raise ValueError("Incomplete JTS document")
+                break
+            c = buf[pos]
+            state = self._state
+
+            if state == self._DATA_ROW or state == self._VALUE or state == self._KEY:
+                if state == self._DATA_ROW and c == ']':
+                    self._state = self._NEXT_KEY
+                    pos += 1
+                    continue
+                if state == self._KEY and c == '}':
+                    self._state = self._END
+                    pos += 1
+                    continue
+                value, value_end = self._decode(buf, pos)
+                if value_end is None:
+                    break
+                pos = value_end
+                if state == self._DATA_ROW:
+                    rows.append(value)
+                    self._state = self._NEXT_ROW
+                elif state == self._KEY:
+                    if not isinstance(value, str):
+                        raise ValueError("Invalid JTS document: expected key at position %d" % pos)
+                    self._key = value
+                    self._state = self._COLON
+                else:
+                    self._set_value(self._key, value)
+                    self._state = self._NEXT_KEY
+            elif state == self._START:
+                self._expect(c, '{', pos)
+                self._state = self._KEY
+                pos += 1
+            elif state == self._COLON:
+                self._expect(c, ':', pos)
+                self._state = self._DATA_START if self._key == 'data' else self._VALUE
+                pos += 1
+            elif state == self._DATA_START:
+                self._expect(c, '[', pos)
+                self._state = self._DATA_ROW
+                pos += 1
+            elif state == self._NEXT_ROW:
+                self._expect(c, ',]', pos)
+                self._state = self._DATA_ROW if c == ',' else self._NEXT_KEY
+                pos += 1
+            elif state == self._NEXT_KEY:
+                self._expect(c, ',}', pos)
+                self._state = self._KEY if c == ',' else self._END
+                pos += 1
+            else:
+                raise ValueError("Invalid JTS document: extra data at position %d" % pos)
+
+        self._buffer = buf[pos:]
+        return rows
+
+    def _decode(self, buf: str, pos: int):
+        try:
+            value, value_end = self._decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise ValueError("Invalid JTS document: cannot decode value at position %d" % pos)
+            return None, None
+        # a number at the end of the buffer may continue in the next chunk
+        if value_end == len(buf) and not self._closed:
+            return None, None
+        return value, value_end
+
+    @staticmethod
+    def _expect(c: str, expected: str, pos: int):
+        if c not in expected:
+            raise ValueError("Invalid JTS document: expected '%s' at position %d" % ("' or '".join(expected), pos))
+
+    def _set_value(self, key: str, value):
+        if key == 'docType':
+            self.doc_type = value
+        elif key == 'version':
+            self.version = value
+        elif key == 'header':
+            self.header = value
+
+
+class JtsStats:
+    """
+    Opt-in instrumentation of JtsDocument output and parsing, e.g. for export to a metrics pipeline.
+    Pass it as ``stats`` to JtsDocument or to fromJSON()/read()/aread(). Timings and counts of every call
+    are added up until reset(). Without stats nothing is measured.
+
+    Timings in seconds, by phase:
+
+    - 'data': building data rows of toJSON(), toJSONString() and toJSONBytes(), including timestamp formatting
+    - 'header': building the header
+    - 'encode': JSON encoding of toJSONString() and toJSONBytes()
+    - 'parse': JSON decoding of fromJSON()
+    - 'load': creating records from decoded rows, including 'timestamps'. Includes JSON decoding for read()
+    - 'timestamps': decoding row timestamps
+
+    Counts:
+
+    - 'rows', 'fields': data rows and fields built
+    - 'records': records of all series read to build the data rows
+    - 'skipped': of these, records with value, quality and annotation all None, which are not output
+    - 'parsed_rows', 'parsed_records': data rows decoded and records created from them
+
+    Incremental, parallel and chunked output is not measured.
+
+    :param callback: Called with (phase, seconds) whenever a phase was timed
+    :type callback: Callable[[str, float], None], optional
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = {}
+        self.counts = {}
+
+    def add_time(self, phase: str, seconds: float):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        if self.callback is not None:
+            self.callback(phase, seconds)
+
+    def add_count(self, name: str, n: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def reset(self):
+        self.timings.clear()
+        self.counts.clear()
+
+    def as_dict(self) -> dict:
+        """
+        Copy of timings and counts
+
+        :rtype: dict
+        """
+        return dict(timings=dict(self.timings), counts=dict(self.counts))
 
 
 class JtsDocument:
@@ -137,15 +1897,20 @@ class JtsDocument:
     """
     JTS document object
 
+    :param incremental: Cache encoded data rows between toJSONString() calls. When records were only appended
+        at or after the current end time, only the rows from the earliest new record on are rebuilt.
+        Changes made with TimeSeries methods (insert, sort, merge) and adding or replacing series or their
+        records rebuild all rows. Changes to records in place (e.g. ``ts.records[0].value = 1`` or replacing
+        a list item) are not detected: call invalidate() after them
+    :type incremental: bool, optional
+    :param stats: Collect timings and counts of building the document
+    :type stats: JtsStats, optional
     :raise [TypeError]: [Value of 'series' must be types of TimeSeries or List[TimeSeries]]
     """
 
     """
     TODO Methods to implement
 
-    // Clone document (also clones series)
-    jtsDocument.clone()
-
     // Create a new jtsDocument from JSON
     const jtsDocument = JtsDocument.from('{"docType": "jts", ...}')
 
@@ -158,7 +1923,8 @@ class JtsDocument:
     jtsDocument.series // [timeseries1, timeseries2]
     """
 
-    def __init__(self, series: Union[List[TimeSeries], TimeSeries] = None, version: str = "1.0"):
+    def __init__(self, series: Union[List[TimeSeries], TimeSeries] = None, version: str = "1.0",
+                 incremental: bool = False, stats: JtsStats = None):
         # enforce accepted types
         if series is not None:
             if (not isinstance(series, list) and not isinstance(series, TimeSeries)) \
@@ -174,6 +1940,14 @@ class JtsDocument:
         else:
             self.series = []
 
+        self.incremental = incremental
+        self.stats = stats
+        # encoded rows of the last toJSONString() call and the state of series they were built from
+        self.__row_cache = None
+        # (series list, indexed series, TimeSeries._renames, {identifier: [column index, ...]},
+        #  {name: [column index, ...]})
+        self.__series_index = None
+
     # def __eq__(self, other):
     #     return self.__dict__ is other.__dict__
 
@@ -181,15 +1955,44 @@ class JtsDocument:
         """
         Add single or multiple TimeSeries
         """
+        start = len(self.series)
         if isinstance(series, list):
             self.series.extend(series)
         # single instance
         else:
             self.series.append(series)
 
+        index = self.__series_index
+        if index is not None and index[0] is self.series and len(index[1]) == start \
+                and index[2] == TimeSeries._renames:
+            _, indexed, _, by_id, by_name = index
+            for idx in range(start, len(self.series)):
+                indexed.append(self.series[idx])
+                by_id.setdefault(self.series[idx].identifier, []).append(idx)
+                by_name.setdefault(self.series[idx].name, []).append(idx)
+
     def __len__(self):
         return self.series.__len__()
 
+    def clone(self, series: List[str] = None) -> JtsDocument:
+        """
+        Copy of the document with clones of its series, see TimeSeries.clone(). Records are shared until
+        they are changed, so the copy takes time in the number of series only.
+
+        :param series: Identifiers of series to include, in document order. All series if not specified
+        :type series: List[str], optional
+        :rtype: JtsDocument
+        """
+        wanted = set(series) if series is not None else None
+        return JtsDocument([s.clone() for s in self.series if wanted is None or s.identifier in wanted],
+                           self.version, self.incremental, self.stats)
+
+    def invalidate(self):
+        """
+        Drop the data rows cached by an incremental document, after records were changed in place
+        """
+        self.__row_cache = None
+
     def toJSON(self) -> dict:
         """
         Output as dictionary of JSON structure
@@ -200,23 +2003,374 @@ class JtsDocument:
         # return json.dumps(self.__build())
         return self.__build()
 
-    def toJSONString(self) -> str:
+    def toJSONString(self, workers: int = None, start: datetime = None, end: datetime = None) -> str:
         """
         Output as stringified JSON (json.dumps)
 
+        :param workers: Build and encode the data section in this many processes. The time axis is split
+            into ranges which are serialized in parallel and joined under one header. Output is identical.
+            Records are sent to the processes in columnar storage, so list-backed series are converted first.
+        :type workers: int, optional
+        :param start: Only output records from start (inclusive), with the header of this time window
+        :type start: datetime, optional
+        :param end: Only output records up to end (exclusive), with the header of this time window
+        :type end: datetime, optional
         :return: Output as stringified JSON
         :rtype: str
         """
-        return json.dumps(self.toJSON(), cls=CustomDatetimeConverter)
+        if start is not None or end is not None:
+            start_ms = _epoch_ms(start) if start is not None else None
+            end_ms = _epoch_ms(end) if end is not None else None
+            window = JtsDocument([s._slice_ms(start_ms, end_ms) for s in self.series], self.version)
+            return window.toJSONString(workers)
+        if self.incremental:
+            return self.__to_json_string_incremental()
+        if workers is not None and workers > 1 \
+                and sum(len(s) for s in self.series) >= _PARALLEL_MIN_RECORDS:
+            return self.__to_json_string_parallel(workers)
+        return _timed(self.stats, 'encode', _ENCODER.encode, self.toJSON())
+
+    def toJSONBytes(self, backend: str = None) -> bytes:
+        """
+        Output as UTF-8 encoded JSON, encoded by the fastest installed JSON library.
+        Same JSON document as toJSONString(), but formatting may differ: e.g. orjson writes no spaces and
+        non-ASCII characters unescaped. Values a library cannot encode (such as ints beyond 64 bits) make it
+        fall back to the standard library, as do NaN and infinite values, which other libraries write as null.
+        Incremental documents are always encoded by the standard library, reusing the rows of toJSONString().
+
+        :param backend: 'orjson', 'msgspec', 'ujson' or 'json' (standard library). The first installed one
+            if not specified
+        :type backend: str, optional
+        :rtype: bytes
+        :raise [ImportError]: [Backend is not installed]
+        :raise [ValueError]: [Unknown backend, or a backend other than 'json' for an incremental document]
+        """
+        if self.incremental:
+            if backend not in (None, 'json'):
+                raise ValueError("Incremental documents are encoded by the 'json' backend only")
+            return self.toJSONString().encode('utf-8')
+
+        encode = _json_codec(backend)[0]
+        if backend != 'json' and any(s._has_non_finite() for s in self.series):
+            encode = _json_codec('json')[0]
+        return _timed(self.stats, 'encode', self.__encode_bytes, encode, self.toJSON())
+
+    @staticmethod
+    def __encode_bytes(encode, doc: dict) -> bytes:
+        try:
+            return encode(doc)
+        except Exception:
+            # values the backend cannot encode
+            return _ENCODER.encode(doc).encode('utf-8')
+
+    def __to_json_string_incremental(self) -> str:
+        self.__check_pending()
+        keys, rows = self.__cached_rows()
+        if not rows:
+            raise Exception("Cannot build without jts 'data'")
+
+        # only the end of the header moves when rows are appended
+        return self.__encode_page(rows, _row_ts(rows[0]), _row_ts(rows[-1]))
+
+    def __cached_rows(self) -> tuple:
+        """
+        Epoch_ms keys and encoded data rows, updated from the cache of the previous call
+        """
+        cache = self.__row_cache
+        start = self.__appended_since(cache) if cache is not None else _UNSET
+        if start is None:
+            return cache['keys'], cache['rows']
+
+        if start is _UNSET:
+            keys, rows = [], []
+            source = self
+        else:
+            # rebuild from the row of the earliest new record on, i.e. at most the last cached row is replaced
+            keys, rows = cache['keys'], cache['rows']
+            cut = bisect.bisect_left(keys, start)
+            del keys[cut:], rows[cut:]
+            source = JtsDocument([s._slice_ms(start, None) for s in self.series], self.version)
+
+        encode = _ENCODER.encode
+        for key, row in source.__iter_keyed_data():
+            keys.append(key)
+            rows.append(encode(row))
+
+        self.__row_cache = dict(keys=keys, rows=rows, series=[self.__series_state(s) for s in self.series])
+        return keys, rows
+
+    @staticmethod
+    def __series_state(s: TimeSeries) -> tuple:
+        keys, _, length = s._time_index()
+        return s, s.records, s.data_type, s._edits, length, keys[length - 1] if length else None
+
+    def __appended_since(self, cache: dict):
+        """
+        Epoch_ms of the earliest record appended since the cache was built, None if nothing changed,
+        or _UNSET if cached rows cannot be reused
+        """
+        if len(cache['series']) != len(self.series):
+            return _UNSET
+
+        start = None
+        for s, (series, store, data_type, edits, length, last) in zip(self.series, cache['series']):
+            if s is not series or s.records is not store or s.data_type != data_type or s._edits != edits:
+                return _UNSET
+            keys, _, count = s._time_index()
+            if count < length or (length and keys[length - 1] != last):
+                return _UNSET
+            if count > length:
+                earliest = min(keys[length:])
+                start = earliest if start is None else min(start, earliest)
+
+        if start is not None and cache['keys'] and start < cache['keys'][-1]:
+            return _UNSET
+        return start
+
+    def __to_json_string_parallel(self, workers: int) -> str:
+        self.__check_pending()
+        bounds = self.__split_time(workers * _PARALLEL_PARTS_PER_WORKER)
+        ranges = zip([None] + bounds, bounds + [None])
+        # parts are sent to the workers as columns, pickling TsRecord objects would cost more than serial encoding
+        parts = [JtsDocument([s._slice_ms(start, end)._as_columnar() for s in self.series], self.version)
+                 for start, end in ranges]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            fragments = [f for f in executor.map(_encode_data_fragment, parts) if f[1]]
+
+        if not fragments:
+            raise Exception("Cannot build without jts 'data'")
+
+        header = self.__make_header(fragments[0][2], fragments[-1][3], sum(f[1] for f in fragments))
+        return self.__encode_prefix(header) + ', '.join(f[0] for f in fragments) + ']}'
+
+    def __split_time(self, parts: int) -> list:
+        """
+        Epoch_ms bounds splitting records of all series into parts of about the same size, from a sample of keys
+        """
+        total = sum(len(s) for s in self.series)
+        step = max(1, total // (parts * 64))
+        sample = sorted(k for s in self.series for k in s._time_index()[0][::step])
+        bounds = {sample[len(sample) * i // parts] for i in range(1, parts)} if sample else set()
+        return sorted(bounds)
+
+    def _encode_data_fragment(self) -> tuple:
+        """
+        Encoded data rows joined as in toJSONString(), number of rows, timestamps of the first and the last row
+        """
+        data = self.__get_data()
+        if not data:
+            return '', 0, None, None
+        return ', '.join(_ENCODER.encode(row) for row in data), len(data), data[0]['ts'], data[-1]['ts']
+
+    def resample(self, interval: timedelta, agg: str = 'mean', origin: datetime = None) -> JtsDocument:
+        """
+        Resample all series to the same time grid, so that each data row holds one interval.
+        See TimeSeries.resample()
+
+        :rtype: JtsDocument
+        """
+        return JtsDocument([s.resample(interval, agg, origin) for s in self.series], self.version)
+
+    def merge(self, other: JtsDocument, on_conflict: str = 'keep_last') -> JtsDocument:
+        """
+        Merge series of the other document into this one, in place. Series are matched by id: records of
+        matching series are merged as in TimeSeries.merge(), other series are added.
+        The document is only changed if all series could be merged.
+
+        :param other: Document to merge, not changed
+        :type other: JtsDocument
+        :param on_conflict: Record kept of records with equal timestamps: 'keep_last', 'keep_first' or 'error'
+        :type on_conflict: str, optional
+        :default on_conflict: 'keep_last'
+        :return: The merged JtsDocument itself
+        :rtype: JtsDocument
+        :raise [ValueError]: [Different data types of series with the same id, or conflicting records with
+            on_conflict 'error']
+        """
+        if on_conflict not in _MERGE_CONFLICTS:
+            raise ValueError("'on_conflict' must be one of %s" % ', '.join(_MERGE_CONFLICTS))
+
+        # column index of the first series with each id, as getColumnIndex()
+        columns = {}
+        for idx, s in enumerate(self.series):
+            columns.setdefault(s.identifier, idx)
+
+        merged = {}
+        added = {}
+        for s in other.series:
+            idx = columns.get(s.identifier)
+            if idx is None:
+                target = added.get(s.identifier)
+                if target is None:
+                    empty = s.records._empty_copy() if isinstance(s.records, ColumnarRecords) else []
+                    target = s._like(empty)
+                added[s.identifier] = target._merged(s, on_conflict)
+            else:
+                merged[idx] = merged.get(idx, self.series[idx])._merged(s, on_conflict)
+
+        for idx, s in merged.items():
+            self.series[idx]._replace_records(s)
+        self.addSeries(list(added.values()))
+        return self
+
+    def iter_chunks(self, chunk_size: int = 1000):
+        """
+        Output as stringified JSON in chunks, without building the whole document string.
+        Concatenated chunks are identical to toJSONString()
+
+        :param chunk_size: Number of data rows per chunk
+        :type chunk_size: int, optional
+        :return: Iterator of JSON string chunks
+        :rtype: Iterator[str]
+        """
+        return (chunk for chunk in self.__iter_chunk_steps(chunk_size) if chunk is not None)
+
+    def __iter_chunk_steps(self, chunk_size: int):
+        """
+        Chunks of iter_chunks(), preceded by None for every chunk_size rows of the first pass
+        """
+        # first pass only counts rows, so neither rows nor their encoded form are ever held all at once
+        count = 0
+        first = last = None
+        for rows in _batched(self.__iter_rows(), chunk_size):
+            if first is None:
+                first = rows[0]
+            last = rows[-1]
+            count += len(rows)
+            yield None
+        if not count:
+            raise Exception("Cannot build without jts 'data'")
+
+        # the timestamp of a row is formatted in the timezone of its first field
+        yield self.__encode_prefix(self.__make_header(_format_ms(first[0], first[1][0][1][1]),
+                                                      _format_ms(last[0], last[1][0][1][1]), count))
+
+        encode = _ENCODER.encode
+        separator = ''
+        for rows in _batched(self.__iter_data(), chunk_size):
+            yield separator + ', '.join([encode(row) for row in rows])
+            separator = ', '
+
+        yield ']}'
+
+    async def awrite(self, stream, chunk_size: int = 1000, executor: concurrent.futures.Executor = None):
+        """
+        Write stringified JSON to a stream without blocking the event loop for long.
+        The document is built and encoded chunk_size rows at a time, switching to other tasks in between,
+        or in the executor (e.g. ThreadPoolExecutor) if specified. Output is identical to toJSONString().
+
+        :param stream: Stream with write() method, e.g. asyncio.StreamWriter. Awaitable write() results are awaited
+            and drain() is awaited after every chunk if the stream has it. Text streams (io.TextIOBase) receive str,
+            others UTF-8 encoded bytes
+        :param chunk_size: Number of data rows per step and write
+        :type chunk_size: int, optional
+        :param executor: Executor to build and encode chunks in
+        :type executor: concurrent.futures.Executor, optional
+        """
+        binary = not isinstance(stream, io.TextIOBase)
+        drain = getattr(stream, 'drain', None)
+        steps = self.__iter_chunk_steps(chunk_size)
+        done = object()
+        while True:
+            chunk = await _run_step(executor, next, steps, done)
+            if chunk is done:
+                break
+            if chunk is None:
+                continue
+            result = stream.write(chunk.encode('utf-8') if binary else chunk)
+            if inspect.isawaitable(result):
+                await result
+            if drain is not None:
+                await drain()
+
+    def write(self, fp, chunk_size: int = 1000):
+        """
+        Write stringified JSON to a file-like object chunk by chunk.
+        Text streams receive str, binary streams (e.g. gzip file, socket) receive UTF-8 encoded bytes.
+
+        :param fp: File-like object with write() method
+        :param chunk_size: Number of data rows per write
+        :type chunk_size: int, optional
+        """
+        binary = not isinstance(fp, io.TextIOBase)
+        for chunk in self.iter_chunks(chunk_size):
+            fp.write(chunk.encode('utf-8') if binary else chunk)
+
+    def paginate(self, max_records: int = None, max_bytes: int = None):
+        """
+        Output as a sequence of stringified JSON documents of consecutive data rows, each with the header
+        of its own rows and all columns. Pages are as large as the limits allow. Rows are built, encoded and
+        split into pages in a single pass, and pages are generated lazily.
+
+        :param max_records: Maximum number of data rows per page
+        :type max_records: int, optional
+        :param max_bytes: Maximum size of a page in bytes, UTF-8 encoded
+        :type max_bytes: int, optional
+        :return: Iterator of JSON strings
+        :rtype: Iterator[str]
+        :raise [ValueError]: [Limits smaller than a single data row]
+        """
+        if max_records is not None and max_records < 1:
+            raise ValueError("'max_records' must be at least 1")
+
+        if self.incremental:
+            rows = ((_row_ts(row), row) for row in self.__cached_rows()[1])
+        else:
+            encode = _ENCODER.encode
+            rows = ((row["ts"], encode(row)) for _, row in self.__iter_keyed_data())
+
+        # size of a page without its rows and the startTime, endTime and recordCount values.
+        # The encoder escapes all non-ASCII characters, so string lengths are sizes in bytes
+        base = len(self.__encode_prefix(self.__make_header('', '', 0))) - 1 + len(']}')
+
+        page = []
+        size = start_ts = end_ts = None
+        for ts, row in rows:
+            if page:
+                if (max_records is not None and len(page) >= max_records) or (
+                        max_bytes is not None
+                        and base + len(start_ts) + len(ts) + len(str(len(page) + 1)) + size + 2 + len(row) > max_bytes):
+                    yield self.__encode_page(page, start_ts, end_ts)
+                    page = []
+
+            if page:
+                size += 2 + len(row)
+            else:
+                if max_bytes is not None and base + 2 * len(ts) + 1 + len(row) > max_bytes:
+                    raise ValueError("Data row at %s does not fit into a page of %d bytes" % (ts, max_bytes))
+                start_ts = ts
+                size = len(row)
+            page.append(row)
+            end_ts = ts
+
+        if start_ts is None:
+            raise Exception("Cannot build without jts 'data'")
+        yield self.__encode_page(page, start_ts, end_ts)
+
+    def __encode_page(self, rows: list, start_ts: str, end_ts: str) -> str:
+        return self.__encode_prefix(self.__make_header(start_ts, end_ts, len(rows))) + ', '.join(rows) + ']}'
+
+    def __encode_prefix(self, header) -> str:
+        # document up to and including the opening bracket of "data", formatted exactly as json.dumps does
+        doc = dict(docType='jts', version=self.version)
+        if header:
+            doc['header'] = header
+        doc['data'] = []
+        return _ENCODER.encode(doc)[:-2]
 
     def __build(self):
         doc = dict(docType='jts',
                    version=self.version)
 
-        data = self.__get_data()
+        stats = self.stats
+        data = _timed(stats, 'data', self.__get_data, stats)
         if not data:
             raise Exception("Cannot build without jts 'data'")
-        header = self.__get_header(data)
+        header = _timed(stats, 'header', self.__get_header, data)
+        if stats is not None:
+            stats.add_count('rows', len(data))
+            stats.add_count('fields', sum(len(row['f']) for row in data))
         if header:
             doc['header'] = header
         doc['data'] = data
@@ -224,11 +2378,14 @@ class JtsDocument:
         return doc
 
     def __get_header(self, data):
-        return dict(startTime=data[0]['ts'],
-                    endTime=data[-1]['ts'],
-                    recordCount=len(data),
+        return self.__make_header(data[0]['ts'], data[-1]['ts'], len(data)) if data else None
+
+    def __make_header(self, start_ts: str, end_ts: str, count: int):
+        return dict(startTime=start_ts,
+                    endTime=end_ts,
+                    recordCount=count,
                     columns=self.__getHeaderColumns()
-                    ) if data else None
+                    )
 
     def __getHeaderColumns(self):
         column_map = {}
@@ -244,29 +2401,167 @@ class JtsDocument:
         return column_map
 
     # build "data" section of the document
-    def __get_data(self):
-        record_map = {}
-        for idx, s in enumerate(self.series):
-            for r in s.records:
-                if (r.value is None) and (r.annotation is None) and (r.quality is None):
-                    continue
-                key = r.timestamp.timestamp()
-
-                if not record_map.get(key):
-                    # Dirty way to convert timestamp to string here, but it is to avoid datetime serialization upstream
-                    record_map[key] = {"ts": r.timestamp.isoformat(timespec='milliseconds'), "f": {}}
-
-                record_map[key]["f"][idx] = self.__getDataColumnFromRecord(r, s.data_type)  # dict of entry values
+    def __get_data(self, stats: JtsStats = None):
+        return list(map(operator.itemgetter(1), self.__iter_keyed_data(stats)))
+
+    def __iter_data(self):
+        return map(operator.itemgetter(1), self.__iter_keyed_data())
+
+    def __iter_keyed_data(self, stats: JtsStats = None):
+        data_types = [s.data_type for s in self.series]
+        # values of array-backed 'NUMBER' storage are numbers already, no need to check them again.
+        # Neither are values of 'deferred' series, checked in a batch before, nor of 'trusted' series
+        numeric = [s.data_type == 'NUMBER' and (s.records.data_type == 'NUMBER'
+                                                if isinstance(s.records, ColumnarRecords) else s.validation != 'strict')
+                   for s in self.series]
+        # values of other 'NUMBER' series are checked again, float and int values here instead of in __getDataColumn
+        number = [data_type == 'NUMBER' for data_type in data_types]
+        column = self.__getDataColumn
+        format_ts = _TimestampFormatter()
+        rows = self.__iter_rows() if stats is None else self.__counted_rows(stats)
+        for key, fields in rows:
+            # Dirty way to convert timestamp to string here, but it is to avoid datetime serialization upstream
+            f = {}
+            row = {"ts": format_ts(key, fields[0][1][1]), "f": f}
+            for idx, (_, _, value, quality, annotation) in fields:
+                # dict of entry values. Later record of the same series and timestamp wins
+                if quality is None and annotation is None and (
+                        numeric[idx] or (value.__class__ is float or value.__class__ is int) and number[idx]):
+                    f[idx] = {"v": value}
+                else:
+                    f[idx] = column(value, quality, annotation, data_types[idx])
+            yield key, row
+
+    def __counted_rows(self, stats: JtsStats):
+        # rows of __iter_rows(), counting the records they were built from
+        fields = 0
+        for row in self.__iter_rows():
+            fields += len(row[1])
+            yield row
+        records = sum(len(s) for s in self.series)
+        stats.add_count('records', records)
+        stats.add_count('skipped', records - fields)
+
+    def __check_pending(self):
+        # records inserted into 'deferred' series since the last build are checked once, in batches
+        for s in self.series:
+            if s._pending:
+                s._check_pending()
+
+    def __iter_rows(self):
+        """
+        Iterate (epoch_ms, [(series index, (epoch_ms, tzinfo, value, quality, annotation)), ...]) of all series
+        in time order.
 
-        # record_map_sorted = dict(sorted(record_map.items()))
-        record_map_sorted = [x[1] for x in sorted(record_map.items())]  # use tuple here?
+        Every series is iterated in time order (only unsorted series get sorted). Series with identical
+        timestamps are walked side by side, other series are merged with a heap based k-way merge.
+        Fields of a row come in series order, records of a series with equal timestamps in insertion order.
+        """
+        self.__check_pending()
+        buckets = {}
+        groups = []
+        known = [None, None]
+        for idx, s in enumerate(self.series):
+            keys, points, complete = s._ordered_points(known)
+            if not keys:
+                continue
+            bucket = buckets.setdefault((len(keys), keys[0], keys[-1]), [])
+            group = next((g for g in bucket if g[0] == keys), None)
+            if group is None:
+                group = (keys, [], [], [])
+                bucket.append(group)
+                groups.append(group)
+            group[1].append(idx)
+            group[2].append(points)
+            group[3].append(complete)
+
+        streams = [self.__iter_group_rows(indexes, points, all(complete)) for _, indexes, points, complete in groups]
+        if len(streams) == 1:
+            yield from streams[0]
+            return
+
+        heads = [next(st, None) for st in streams]
+        heap = [(head[0], i) for i, head in enumerate(heads) if head is not None]
+        heapq.heapify(heap)
+
+        while heap:
+            key, i = heap[0]
+            fields = heads[i][1]
+            merged = False
+            while heap and heap[0][0] == key:
+                i = heap[0][1]
+                if merged or fields is not heads[i][1]:
+                    fields = fields + heads[i][1]
+                    merged = True
+                head = heads[i] = next(streams[i], None)
+                if head is None:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (head[0], i))
 
-        return record_map_sorted
+            if merged:
+                fields.sort(key=operator.itemgetter(0))  # stable
+            yield key, fields
 
-    def __getDataColumnFromRecord(self, r, data_type):
+    @staticmethod
+    def __iter_group_rows(indexes, iterators, complete: bool):
+        """
+        Iterate (epoch_ms, fields) rows of series sharing the same sorted timestamps.
+        Records with value, quality and annotation all None are skipped, there are none if complete.
+        """
+        row_key = None
+        fields = []
+        if len(iterators) == 1:
+            # a single series, whose fields of a row are in order anyway
+            idx = indexes[0]
+            for point in iterators[0]:
+                if not complete and point[2] is None and point[3] is None and point[4] is None:
+                    continue
+                if point[0] != row_key:
+                    if fields:
+                        yield row_key, fields
+                    row_key = point[0]
+                    fields = [(idx, point)]
+                else:
+                    fields.append((idx, point))
+            if fields:
+                yield row_key, fields
+            return
+
+        repeated = False
+        for points in zip(*iterators):
+            key = points[0][0]
+            if key != row_key:
+                if fields:
+                    if repeated:
+                        fields.sort(key=operator.itemgetter(0))  # stable
+                    yield row_key, fields
+                row_key = key
+                repeated = False
+                if complete:
+                    fields = list(zip(indexes, points))
+                    continue
+                fields = []
+            elif fields:
+                # records with equal timestamps, fields must still come in series order
+                repeated = True
+
+            if complete:
+                fields += zip(indexes, points)
+                continue
+            for field in zip(indexes, points):
+                point = field[1]
+                if point[2] is not None or point[3] is not None or point[4] is not None:
+                    fields.append(field)
+
+        if fields:
+            if repeated:
+                fields.sort(key=operator.itemgetter(0))
+            yield row_key, fields
+
+    def __getDataColumn(self, v, quality, annotation, data_type):
 
         column = {}
-        v = r.value
         if v is not None:
             if data_type == 'NUMBER':
                 if isinstance(v, float) or isinstance(v, int):
@@ -280,56 +2575,405 @@ class JtsDocument:
         # case 'TIME': return { $time: (v as Date).toISOString?.() || 'invalid date' }
         # case 'COORDINATES': return { $coords: ((v as Array<number>).length === 2 ? v : []) }
 
-        if r.quality:
-            column["q"] = r.quality
+        if quality:
+            column["q"] = quality
 
-        if r.annotation:
-            column["a"] = r.annotation
+        if annotation:
+            column["a"] = annotation
 
         return column
 
     @staticmethod
-    def fromJSON(json_str: str) -> JtsDocument:
+    def fromJSON(json_str: Union[str, bytes], series: List[str] = None, backend: str = None,
+                 stats: JtsStats = None) -> JtsDocument:
         """
         Create a new jtsDocument from JSON
+
+        :param json_str: JTS document JSON
+        :type json_str: Union[str, bytes]
+        :param series: Identifiers of series to load. Other columns are skipped. All series if not specified
+        :type series: List[str], optional
+        :param backend: JSON library to decode with, see toJSONBytes()
+        :type backend: str, optional
+        :param stats: Collect timings and counts of parsing, and of building the returned document
+        :type stats: JtsStats, optional
+        """
+        json_obj = _timed(stats, 'parse', JtsDocument.__decode_json, _json_codec(backend)[1], json_str)
+
+        jts_doc, columns = JtsDocument.__from_header(json_obj.get('version'), json_obj['header'], series, stats)
+
+        # add records to corresponding series
+        JtsDocument.__load_rows(None, json_obj['data'], jts_doc, columns, series, stats)
+
+        return jts_doc
+
+    @staticmethod
+    def __decode_json(decode, json_str: Union[str, bytes]):
+        try:
+            return decode(json_str)
+        except ValueError:
+            # e.g. NaN, which only the standard library accepts. Invalid JSON raises its error there too
+            if decode is json.loads:
+                raise
+            return json.loads(json_str)
+
+    @staticmethod
+    def read(fp, chunk_size: int = 65536, series: List[str] = None, stats: JtsStats = None) -> JtsDocument:
+        """
+        Create a new jtsDocument from JSON read from a text or binary file-like object.
+        Rows are decoded one at a time, so the JSON text is never held in memory as a whole.
+        The 'header' must precede 'data' in the document.
+
+        :param fp: Text or binary file-like object with read() method
+        :param chunk_size: Number of characters or bytes read at once
+        :type chunk_size: int, optional
+        :param series: Identifiers of series to load. Other columns are skipped. All series if not specified
+        :type series: List[str], optional
+        :param stats: Collect timings and counts of reading, and of building the returned document
+        :type stats: JtsStats, optional
+        """
+        reader = JtsReader(fp, chunk_size)
+        jts_doc, _ = JtsDocument.__load_rows(reader, reader, None, None, series, stats)
+        return JtsDocument.__loaded(reader, jts_doc, series, stats)
+
+    @staticmethod
+    async def aread(stream, chunk_size: int = 65536, series: List[str] = None,
+                    executor: concurrent.futures.Executor = None, stats: JtsStats = None) -> JtsDocument:
         """
+        Create a new jtsDocument from JSON read from a stream without blocking the event loop for long.
+        Every chunk is parsed and its rows are inserted as one step, switching to other tasks in between,
+        or in the executor (e.g. ThreadPoolExecutor) if specified. See read()
+
+        :param stream: Stream with read(size) method, e.g. asyncio.StreamReader. Awaitable results are awaited
+        :param chunk_size: Number of characters or bytes read at once
+        :type chunk_size: int, optional
+        :param series: Identifiers of series to load. Other columns are skipped. All series if not specified
+        :type series: List[str], optional
+        :param executor: Executor to parse chunks in
+        :type executor: concurrent.futures.Executor, optional
+        :param stats: Collect timings and counts of reading, and of building the returned document
+        :type stats: JtsStats, optional
+        :rtype: JtsDocument
+        """
+        reader = JtsReader(chunk_size=chunk_size)
+        loaded = None, None
+
+        def load(data):
+            rows = reader.feed(data) if data else reader.close()
+            return JtsDocument.__load_rows(reader, rows, *loaded, series, stats)
+
+        while True:
+            data = stream.read(chunk_size)
+            if inspect.isawaitable(data):
+                data = await data
+            loaded = await _run_step(executor, load, data)
+            if not data:
+                break
+
+        return JtsDocument.__loaded(reader, loaded[0], series, stats)
 
-        json_obj = json.loads(json_str)
+    @staticmethod
+    def __load_rows(reader: JtsReader, rows, jts_doc: JtsDocument, columns: dict, series: List[str] = None,
+                    stats: JtsStats = None):
+        """
+        Insert decoded rows into the document, which is created from the header before the first row.
+        Returns the document and its columns
+        """
+        projected = series is not None
+        rows = iter(rows)
+        if jts_doc is None:
+            first = next(rows, None)
+            if first is None:
+                return None, None
+            jts_doc, columns = JtsDocument.__from_reader_header(reader, series, stats)
+            rows = chain((first,), rows)
+
+        if stats is None:
+            for batch in _batched(rows, _LOAD_BATCH_ROWS):
+                JtsDocument.__insert_rows(columns, batch, projected)
+            return jts_doc, columns
+
+        # same as above, timed and counted
+        perf_counter = time.perf_counter
+        elapsed = 0.0
+
+        def parse(ts: str) -> datetime:
+            nonlocal elapsed
+            start_ts = perf_counter()
+            try:
+                return _parse_timestamp(ts)
+            finally:
+                elapsed += perf_counter() - start_ts
+
+        start = perf_counter()
+        count = records = 0
+        try:
+            for batch in _batched(rows, _LOAD_BATCH_ROWS):
+                records += JtsDocument.__insert_rows(columns, batch, projected, parse)
+                count += len(batch)
+        finally:
+            stats.add_count('parsed_rows', count)
+            stats.add_count('parsed_records', records)
+            stats.add_time('timestamps', elapsed)
+            stats.add_time('load', perf_counter() - start)
+        return jts_doc, columns
 
-        jts_doc = JtsDocument(version=json_obj.get('version'))
+    @staticmethod
+    def __from_reader_header(reader: JtsReader, series: List[str] = None, stats: JtsStats = None):
+        if reader.header is None:
+            raise Exception("JTS 'header' must precede 'data' to read the document incrementally")
+        return JtsDocument.__from_header(reader.version, reader.header, series, stats)
+
+    @staticmethod
+    def __loaded(reader: JtsReader, jts_doc: JtsDocument, series: List[str] = None,
+                 stats: JtsStats = None) -> JtsDocument:
+        # document without data rows is created from the header at the end
+        if jts_doc is None:
+            if reader.header is None:
+                raise Exception("Cannot read JTS document without 'header'")
+            jts_doc, _ = JtsDocument.__from_header(reader.version, reader.header, series, stats)
+        return jts_doc
+
+    @staticmethod
+    def iter_records(fp, chunk_size: int = 65536):
+        """
+        Iterate records of JTS document read from a text or binary file-like object, without building
+        the document. See JtsReader for access to the header.
+
+        :param fp: Text or binary file-like object with read() method
+        :param chunk_size: Number of characters or bytes read at once
+        :type chunk_size: int, optional
+        :return: Iterator of (column index, TsRecord)
+        :rtype: Iterator[tuple]
+        """
+        return JtsReader(fp, chunk_size).iter_records()
+
+    @staticmethod
+    def __from_header(version, header, series: List[str] = None, stats: JtsStats = None):
+        """
+        Build document with series of header columns, only of the given identifiers if series is specified.
+        Returns the document and dict of header column key to TimeSeries.
+        """
+        jts_doc = JtsDocument(version=version, stats=stats)
+        columns = {}
+        wanted = set(series) if series is not None else None
 
         # build series from header columns
-        for idx, c in json_obj['header']["columns"].items():
-            jts_doc.addSeries(TimeSeries(
+        for idx, c in header["columns"].items():
+            if wanted is not None and c.get("id") not in wanted:
+                continue
+            columns[idx] = TimeSeries(
                 identifier=c.get("id"),
                 name=c.get("name"),
                 data_type=c.get("dataType"),
                 units=c.get("units"))
-            )
+            jts_doc.addSeries(columns[idx])
 
-        # add records to corresponding series
-        for e in json_obj['data']:
-
-            ts = parser.parse(e["ts"])
-            f = e["f"]
-
-            for i, r in f.items():
-                jts_doc.series[int(i)].insert(
-                    TsRecord(
-                        timestamp=ts,
-                        value=r.get('v'),
-                        quality=r.get('q'),
-                        annotation=r.get('a'))
-                )
-                # else:
-                #     raise Exception("Data columns do not match Header columns")
+        return jts_doc, columns
+
+    @staticmethod
+    def __insert_rows(columns: dict, rows: list, projected: bool, parse=_parse_timestamp) -> int:
+        """
+        Insert a batch of decoded rows with one insert() per series. Returns the number of records inserted
+        """
+        batches = {}
+        count = 0
+        for row in rows:
+            f = row["f"]
+            if projected:
+                # only look up the requested columns, the rest of the row is skipped
+                fields = [(i, f[i]) for i in columns if i in f]
+                if not fields:
+                    continue
+            else:
+                fields = f.items()
+
+            ts = parse(row["ts"])
+            for i, r in fields:
+                records = batches.get(i)
+                if records is None:
+                    if i not in columns:
+                        raise Exception("Data columns do not match Header columns")
+                    records = batches[i] = []
+                records.append(TsRecord(
+                    timestamp=ts,
+                    value=r.get('v'),
+                    quality=r.get('q'),
+                    annotation=r.get('a')))
+
+        for i, records in batches.items():
+            columns[i].insert(records)
+            count += len(records)
+        return count
+
+    def to_binary(self) -> bytes:
+        """
+        Compact binary encoding of the document, see json_timeseries.binary.
+        Much smaller than JTS JSON and faster to decode.
+
+        :rtype: bytes
+        :raise [ValueError]: [Timezone which is neither a fixed offset nor a zoneinfo timezone]
+        """
+        from json_timeseries import binary
+        return binary.encode_document(self)
+
+    @staticmethod
+    def from_binary(data: bytes) -> JtsDocument:
+        """
+        Decode JtsDocument with columnar series from to_binary() output
 
+        :rtype: JtsDocument
+        :raise [ValueError]: [Invalid or truncated data]
+        """
+        from json_timeseries import binary
+        return binary.decode_document(data)
+
+    @staticmethod
+    def from_csv(source, **options) -> JtsDocument:
+        """
+        Create a new jtsDocument from CSV with a timestamp column and value columns, a columnar series per
+        value column. Rows are converted in batches straight into series storage.
+        See json_timeseries.ingest.read_csv() for the options
+
+        :param source: Path, or text or binary file-like object
+        :rtype: JtsDocument
+        :raise [ValueError]: [Missing columns, invalid rows, timestamps or values]
+        """
+        from json_timeseries import ingest
+        return ingest.read_csv(source, **options)
+
+    @staticmethod
+    def from_ndjson(source, **options) -> JtsDocument:
+        """
+        Create a new jtsDocument from NDJSON, a JSON object per line with a timestamp and values,
+        a columnar series per value key. See json_timeseries.ingest.read_ndjson() for the options
+
+        :param source: Path, or text or binary file-like object
+        :rtype: JtsDocument
+        :raise [ValueError]: [Missing or invalid timestamps, invalid JSON or quality codes]
+        :raise [TypeError]: ['NUMBER' values are not int or float]
+        """
+        from json_timeseries import ingest
+        return ingest.read_ndjson(source, **options)
+
+    def to_dataframe(self):
+        """
+        Series values as pandas DataFrame with a UTC DatetimeIndex and a column per series identifier.
+        Requires pandas (``pip install json-timeseries[pandas]``).
+
+        Series are aligned on the union of their timestamps, missing values are NaN. Of records with
+        equal timestamps the last one is used, as in JTS output. Header columns are kept in
+        ``DataFrame.attrs['jts_columns']``.
+
+        :rtype: pandas.DataFrame
+        """
+        pd = _import_optional('pandas', 'pandas')
+
+        columns = []
+        for s in self.series:
+            timestamps, values, _ = s.to_numpy(copy=True)
+            column = pd.Series(values, index=pd.DatetimeIndex(timestamps, tz='UTC'), name=s.identifier)
+            columns.append(column[~column.index.duplicated(keep='last')])
+
+        df = pd.concat(columns, axis=1).sort_index() if columns else pd.DataFrame(index=pd.DatetimeIndex([], tz='UTC'))
+        df.attrs['jts_columns'] = list(self.__getHeaderColumns().values())
+        return df
+
+    @staticmethod
+    def from_dataframe(df, version: str = "1.0") -> JtsDocument:
+        """
+        Create a new jtsDocument from pandas DataFrame with DatetimeIndex, a series per column.
+        Requires pandas (``pip install json-timeseries[pandas]``).
+
+        Column names are used as series identifiers and names, unless ``DataFrame.attrs['jts_columns']``
+        (as set by to_dataframe) describes them. NaN values are treated as missing.
+        Timestamps of a tz-naive index are treated as UTC.
+
+        :rtype: JtsDocument
+        """
+        pd = _import_optional('pandas', 'pandas')
+        np = _import_optional('numpy', 'numpy')
+
+        index = pd.DatetimeIndex(df.index)
+        tz = index.tz
+        if tz is None:
+            tz = timezone.utc
+        else:
+            index = index.tz_convert('UTC').tz_localize(None)
+        timestamps = index.values.astype('datetime64[ms]')
+
+        meta = {c.get('id'): c for c in df.attrs.get('jts_columns', [])}
+        jts_doc = JtsDocument(version=version)
+        for name in df.columns:
+            c = meta.get(name, {})
+            values = df[name].to_numpy()
+            data_type = c.get('dataType') or ('NUMBER' if np.issubdtype(values.dtype, np.number) else 'TEXT')
+            jts_doc.addSeries(TimeSeries.from_numpy(timestamps, values, name=c.get('name', str(name)),
+                                                    units=c.get('units'), identifier=str(name),
+                                                    data_type=data_type, tz=tz))
         return jts_doc
 
     def getSeries(self, identifier: str) -> TimeSeries:
         """
-        Get series by id
+        Get series by id, the first one if there are several
+        """
+        idx = self.getColumnIndex(identifier)
+        return self.series[idx] if idx is not None else None
+
+    def getColumnIndex(self, identifier: str) -> Union[int, None]:
+        """
+        Index of the series with the id in header columns and data fields, the first one if there are several
+
+        :rtype: int or None
+        """
+        found = self.__lookup('identifier', identifier)
+        return found[0] if found else None
+
+    def findSeries(self, identifier: str = None, name: str = None) -> List[TimeSeries]:
         """
+        Get all series with the id and/or the name, in column order
 
-        # TODO: return list of found series
-        return next((x for x in self.series if x.identifier == identifier), None)
+        :param identifier: Time series ID
+        :type identifier: str, optional
+        :param name: Time series name
+        :type name: str, optional
+        :rtype: List[TimeSeries]
+        """
+        if identifier is None and name is None:
+            return list(self.series)
+        if identifier is None:
+            found = self.__lookup('name', name)
+        else:
+            found = self.__lookup('identifier', identifier)
+            if name is not None:
+                found = [idx for idx in found if self.series[idx].name == name]
+        return [self.series[idx] for idx in found]
+
+    def __reindex(self) -> tuple:
+        by_id, by_name = {}, {}
+        for idx, s in enumerate(self.series):
+            by_id.setdefault(s.identifier, []).append(idx)
+            by_name.setdefault(s.name, []).append(idx)
+        index = self.__series_index = (self.series, list(self.series), TimeSeries._renames, by_id, by_name)
+        return index
+
+    def __lookup(self, attribute: str, value: str) -> list:
+        """
+        Column indexes of series with the attribute ('identifier' or 'name') equal to the value.
+        The index is kept up to date by addSeries() and rebuilt when the series list was replaced or resized,
+        or ids or names of series were changed. Series replaced in place are detected when they are looked up
+        or a lookup misses.
+        """
+        series = self.series
+        index = self.__series_index
+        if index is None or index[0] is not series or len(index[1]) != len(series) \
+                or index[2] != TimeSeries._renames:
+            index = self.__reindex()
+
+        found = (index[3] if attribute == 'identifier' else index[4]).get(value)
+        indexed = index[1]
+        if found is None or not all(series[idx] is indexed[idx] for idx in found):
+            if not all(map(operator.is_, series, indexed)):
+                index = self.__reindex()
+                found = (index[3] if attribute == 'identifier' else index[4]).get(value)
+        return found or []
@@ -0,0 +1,255 @@
+"""
+Append-only on-disk segments of TimeSeries, opened with mmap.
+
+A segment is a directory holding one series:
+
+- ``header.json``: JTS column metadata (id, name, units, dataType), number of records, timezone and sort order
+- ``timestamps.i8``: epoch milliseconds, int64
+- ``values.f8``: 'NUMBER' values, float64 (NaN for missing values)
+- ``kinds.i1``: kind of every 'NUMBER' value, int8, only if some values are not floats
+- ``sparse.json``: quality codes, annotations, per record timezones and values which are not in the fixed-width
+  columns (values of other data types, big ints)
+
+Opened segments map the fixed-width columns into memory, so opening is instant, the operating system only reads
+the pages that are used, and processes opening the same segment share them. Records appended to an opened series
+are kept in memory; use append_segment() to add records to the segment itself.
+
+The record count in the header is written last, so a segment interrupted while appending still opens with
+the records it had before.
+"""
+import importlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import timedelta, timezone
+from typing import List
+
+from json_timeseries.jts import ColumnarRecords, TimeSeries, TsRecord, _UNSET, _is_sorted
+
+FORMAT = 'jts-segment'
+FORMAT_VERSION = 1
+
+_HEADER = 'header.json'
+_SPARSE = 'sparse.json'
+# column file and array typecode
+_COLUMNS = {'timestamps': ('timestamps.i8', 'q'), 'values': ('values.f8', 'd'), '_kinds': ('kinds.i1', 'b')}
+
+
+def write_segment(ts: TimeSeries, path: str):
+    """
+    Write the series as a new segment, replacing the segment at path if there is one
+
+    :param ts: Time series
+    :type ts: TimeSeries
+    :param path: Segment directory
+    :type path: str
+    :raise [ValueError]: [Timezone which is neither a fixed offset nor a zoneinfo timezone]
+    """
+    store = ts.records
+    if not isinstance(store, ColumnarRecords):
+        store = ColumnarRecords(ts.data_type, store)
+
+    os.makedirs(path, exist_ok=True)
+    for attribute, (filename, _) in _COLUMNS.items():
+        column = getattr(store, attribute) if attribute != 'values' or store.data_type == 'NUMBER' else None
+        if column is None:
+            if os.path.exists(os.path.join(path, filename)):
+                os.remove(os.path.join(path, filename))
+            continue
+        _write_column(path, filename, column)
+
+    _write_json(path, _SPARSE, _sparse(store, 0))
+    _write_json(path, _HEADER, dict(
+        format=FORMAT,
+        version=FORMAT_VERSION,
+        id=ts.identifier,
+        name=ts.name,
+        units=ts.units,
+        dataType=ts.data_type,
+        storeType=store.data_type,
+        count=len(store),
+        tz=_encode_tz(store.tz),
+        sorted=_is_sorted(store.timestamps),
+    ))
+
+
+def append_segment(path: str, records: List[TsRecord]):
+    """
+    Append records to the segment at path
+
+    :param path: Segment directory
+    :type path: str
+    :param records: Records to append
+    :type records: List[TsRecord]
+    :raise [TypeError]: [Records are not TsRecord or 'NUMBER' values are not int or float]
+    """
+    header = _read_json(path, _HEADER)
+    count = header['count']
+    store = ColumnarRecords(header['storeType'])
+    if count:
+        store.tz = _decode_tz(header['tz'])
+    store.extend(records)
+    if not len(store):
+        return
+
+    last = _read_last_timestamp(path, count)
+    for attribute, (filename, typecode) in _COLUMNS.items():
+        if attribute == 'values' and store.data_type != 'NUMBER':
+            continue
+        filename = os.path.join(path, filename)
+        exists = os.path.exists(filename)
+        column = getattr(store, attribute)
+        if column is None:
+            if not exists:
+                continue
+            # the segment has value kinds, the appended values are all floats
+            column = array(typecode, bytes(len(store)))
+
+        size = count * array(typecode).itemsize
+        with open(filename, 'r+b' if exists else 'wb') as fp:
+            if exists:
+                # drop what an interrupted append may have left behind
+                fp.truncate(size)
+                fp.seek(size)
+            else:
+                # first values which are not floats: earlier values are all floats
+                fp.write(bytes(size))
+            fp.write(_to_little_endian(column))
+
+    sparse = _read_json(path, _SPARSE)
+    for key, items in _sparse(store, count).items():
+        if key == 'values':
+            sparse[key] = sparse[key][:count] + items
+        else:
+            sparse[key] = {k: v for k, v in sparse[key].items() if int(k) < count}
+            sparse[key].update(items)
+    _write_json(path, _SPARSE, sparse)
+
+    timestamps = store.timestamps
+    header['sorted'] = header['sorted'] and (last is None or last <= timestamps[0]) and _is_sorted(timestamps)
+    if not count:
+        header['tz'] = _encode_tz(store.tz)
+    header['count'] = count + len(store)
+    _write_json(path, _HEADER, header)
+
+
+def open_segment(path: str) -> TimeSeries:
+    """
+    Open the segment at path as columnar TimeSeries with memory-mapped timestamps and values
+
+    :param path: Segment directory
+    :type path: str
+    :rtype: TimeSeries
+    :raise [ValueError]: [Not a segment of a supported format version]
+    """
+    header = _read_json(path, _HEADER)
+    if header.get('format') != FORMAT or header.get('version') != FORMAT_VERSION:
+        raise ValueError("'%s' is not a JTS segment of version %d" % (path, FORMAT_VERSION))
+
+    count = header['count']
+    store = ColumnarRecords(header['storeType'])
+    store.tz = _decode_tz(header['tz']) if count else _UNSET
+    for attribute, (filename, typecode) in _COLUMNS.items():
+        if attribute == 'values' and store.data_type != 'NUMBER':
+            continue
+        filename = os.path.join(path, filename)
+        if os.path.exists(filename):
+            setattr(store, attribute, _map_column(filename, typecode, count))
+
+    sparse = _read_json(path, _SPARSE)
+    for key, column in (('quality', store.quality), ('annotation', store.annotation),
+                        ('objects', store._objects)):
+        column.update((int(k), v) for k, v in sparse[key].items() if int(k) < count)
+    store._tz.update((int(k), _decode_tz(v)) for k, v in sparse['tz'].items() if int(k) < count)
+    if store.data_type != 'NUMBER':
+        store.values = sparse['values'][:count]
+
+    ts = TimeSeries(name=header['name'], units=header['units'], identifier=header['id'],
+                    data_type=header['dataType'], records=store)
+    # sort order is known, so that time lookups only read the pages they need
+    ts._index = (store, store.timestamps, count, header['sorted'])
+    return ts
+
+
+def _map_column(filename: str, typecode: str, count: int):
+    size = count * array(typecode).itemsize
+    if not size:
+        return array(typecode)
+    if sys.byteorder != 'little':
+        with open(filename, 'rb') as fp:
+            column = array(typecode, fp.read(size))
+        column.byteswap()
+        return column
+
+    with open(filename, 'rb') as fp:
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    # the mapping stays open as long as views of it exist
+    return memoryview(mapped)[:size].cast(typecode)
+
+
+def _to_little_endian(column) -> bytes:
+    if sys.byteorder == 'little':
+        return column.tobytes()
+    column = array(column.format if isinstance(column, memoryview) else column.typecode, column.tobytes())
+    column.byteswap()
+    return column.tobytes()
+
+
+def _write_column(path: str, filename: str, column):
+    # replaced instead of rewritten in place, as the file may be mapped by opened segments, even the one written
+    temp = os.path.join(path, filename + '.tmp')
+    with open(temp, 'wb') as fp:
+        fp.write(_to_little_endian(column))
+    os.replace(temp, os.path.join(path, filename))
+
+
+def _read_last_timestamp(path: str, count: int):
+    if not count:
+        return None
+    with open(os.path.join(path, _COLUMNS['timestamps'][0]), 'rb') as fp:
+        fp.seek((count - 1) * 8)
+        return int.from_bytes(fp.read(8), 'little', signed=True)
+
+
+def _sparse(store: ColumnarRecords, offset: int) -> dict:
+    # sparse columns with record indexes shifted by offset, as JSON
+    sparse = dict(quality={}, annotation={}, objects={}, tz={})
+    for key, column in (('quality', store.quality), ('annotation', store.annotation), ('objects', store._objects)):
+        sparse[key] = {str(i + offset): v for i, v in column.items()}
+    sparse['tz'] = {str(i + offset): _encode_tz(tz) for i, tz in store._tz.items()}
+    sparse['values'] = list(store.values) if store.data_type != 'NUMBER' else []
+    return sparse
+
+
+def _encode_tz(tz):
+    if tz is None or tz is _UNSET:
+        return None
+    if tz.utcoffset(None) is not None:
+        return dict(offset=tz.utcoffset(None) // timedelta(microseconds=1))
+    if getattr(tz, 'key', None):
+        # zoneinfo.ZoneInfo
+        return dict(key=tz.key)
+    raise ValueError("Timezone '%s' cannot be stored. Use a fixed offset or zoneinfo timezone" % tz)
+
+
+def _decode_tz(value):
+    if value is None:
+        return None
+    if 'key' in value:
+        return importlib.import_module('zoneinfo').ZoneInfo(value['key'])
+    return timezone(timedelta(microseconds=value['offset'])) if value['offset'] else timezone.utc
+
+
+def _read_json(path: str, filename: str):
+    with open(os.path.join(path, filename), encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def _write_json(path: str, filename: str, obj):
+    # replaced atomically, so readers see either the old or the new file
+    temp = os.path.join(path, filename + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as fp:
+        json.dump(obj, fp)
+    os.replace(temp, os.path.join(path, filename))
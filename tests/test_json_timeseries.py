@@ -1,9 +1,34 @@
+import asyncio
+import gzip
+import io
 import json
+import os
+import tempfile
+import time
 import unittest
-from datetime import datetime, timedelta
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from string import Template
 
-from json_timeseries import TsRecord, TimeSeries, JtsDocument
+from json_timeseries import TsRecord, TimeSeries, JtsDocument, JtsReader, JtsStats
+from json_timeseries import jts
+from json_timeseries.segment import append_segment
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
 
 
 class TestTimeSeries(unittest.TestCase):
@@ -37,6 +62,177 @@ class TestTimeSeries(unittest.TestCase):
         ts.insert([TsRecord(datetime.now(), 55), TsRecord(datetime.now(), 77)])
         self.assertEqual(5, len(ts))
 
+    def test_columnar_insert(self):
+        ts = TimeSeries(name='TEST1', identifier=self.TEST_UUID, units='C', records=self.NUMBER_RECORDS,
+                        columnar=True)
+        ts.insert(TsRecord(datetime.now(), 55))
+        ts.insert([TsRecord(datetime.now(), 1.5), TsRecord(datetime.now(), None, quality=1)])
+        self.assertTrue(ts.columnar)
+        self.assertEqual(6, len(ts))
+
+        first = ts.records[0]
+        self.assertEqual(first.timestamp, self.ONE_MINUTE_AGO.replace(
+            microsecond=self.ONE_MINUTE_AGO.microsecond // 1000 * 1000))
+        self.assertEqual((first.value, first.quality, first.annotation), (1, 192, 'comment'))
+        self.assertIsInstance(first.value, int)
+        self.assertEqual([r.value for r in ts.records][3:], [55, 1.5, None])
+        self.assertEqual(ts.records[-1].quality, 1)
+
+    def test_sorted_index(self):
+        for columnar in (False, True):
+            ts = TimeSeries(name='TEST1', records=list(self.NUMBER_RECORDS), columnar=columnar)
+            self.assertFalse(ts.is_sorted)
+            self.assertEqual(ts.first().value, 0)
+            self.assertEqual(ts.last().value, 2)
+            self.assertEqual(ts.slice(self.ONE_MINUTE_AGO).records[0].value, 1)
+
+            self.assertIs(ts.sort(), ts)
+            self.assertTrue(ts.is_sorted)
+            self.assertEqual([r.value for r in ts.records], [0, 1, 2])
+
+            # in-order insertion, after records with equal timestamp
+            ts.insert(TsRecord(self.ONE_MINUTE_AGO, 3))
+            ts.insert([TsRecord(self.NOW + timedelta(seconds=1), 5), TsRecord(self.TWO_MINUTE_AGO, 4)])
+            self.assertTrue(ts.is_sorted)
+            self.assertEqual([r.value for r in ts.records], [0, 4, 1, 3, 2, 5])
+
+            self.assertEqual([r.value for r in ts.slice(self.ONE_MINUTE_AGO, self.NOW).records], [1, 3])
+            self.assertEqual([r.value for r in ts.slice(end=self.ONE_MINUTE_AGO).records], [0, 4])
+            self.assertEqual(len(ts.slice(self.NOW, self.ONE_MINUTE_AGO)), 0)
+            self.assertEqual(ts.slice().identifier, ts.identifier)
+            self.assertEqual(ts.at(self.ONE_MINUTE_AGO).value, 3)
+            self.assertIsNone(ts.at(self.NOW - timedelta(seconds=1)))
+            self.assertEqual((ts.first().value, ts.last().value), (0, 5))
+
+    @unittest.skipUnless(numpy, "requires numpy")
+    def test_numpy(self):
+        utc = timezone.utc
+        timestamps = numpy.array(['2023-01-01T00:00:00.000', '2023-01-01T00:00:01.500', '2023-01-01T00:00:03.000'],
+                                 dtype='datetime64[ms]')
+        ts = TimeSeries.from_numpy(timestamps, numpy.array([1.5, numpy.nan, 3.0]), quality=[192, numpy.nan, 0],
+                                   name='TEST1', identifier='series_1')
+        self.assertTrue(ts.columnar)
+        self.assertEqual([(r.timestamp, r.value, r.quality) for r in ts.records], [
+            (datetime(2023, 1, 1, tzinfo=utc), 1.5, 192),
+            (datetime(2023, 1, 1, 0, 0, 1, 500000, tzinfo=utc), None, None),
+            (datetime(2023, 1, 1, 0, 0, 3, tzinfo=utc), 3.0, 0)])
+
+        int_ts = TimeSeries.from_numpy(timestamps.view('int64'), numpy.array([1, 2, 3]), name='TEST2')
+        self.assertEqual([r.value for r in int_ts.records], [1, 2, 3])
+        self.assertIsInstance(int_ts.records[0].value, int)
+
+        out_ts, out_values, out_quality = int_ts.to_numpy()
+        numpy.testing.assert_array_equal(out_ts, timestamps)
+        numpy.testing.assert_array_equal(out_values, [1.0, 2.0, 3.0])
+        self.assertIsNone(out_quality)
+
+        # records cannot be inserted while views exist, and a failed insert leaves the columns aligned
+        del out_ts, out_values
+        for series, value in ((int_ts, 4), (TimeSeries(name='TEST7', data_type='TEXT', columnar=True, records=[
+                TsRecord(datetime(2023, 1, 1, tzinfo=utc), 'a')]), 'b')):
+            views = series.to_numpy()
+            with self.assertRaises(BufferError):
+                series.insert(TsRecord(datetime(2023, 1, 1, 0, 0, 4, tzinfo=utc), value))
+            del views
+            series.insert(TsRecord(datetime(2023, 1, 1, 0, 0, 6, tzinfo=utc), value))
+            self.assertEqual((series.last().timestamp.second, series.last().value), (6, value))
+            self.assertEqual(len(series.records.timestamps), len(series.records.values))
+
+        # zero-copy view on the columnar storage of a float series
+        float_ts = TimeSeries.from_numpy(timestamps, numpy.array([1.5, 2.5, 3.5]), name='TEST3')
+        self.assertTrue(numpy.shares_memory(float_ts.to_numpy()[1], numpy.frombuffer(float_ts.records.values)))
+        self.assertFalse(numpy.shares_memory(float_ts.to_numpy(copy=True)[1],
+                                             numpy.frombuffer(float_ts.records.values)))
+
+        list_ts = TimeSeries(name='TEST4', records=[TsRecord(r.timestamp, r.value, r.quality) for r in ts.records])
+        for expected, actual in zip(ts.to_numpy(), list_ts.to_numpy()):
+            numpy.testing.assert_array_equal(expected, actual)
+
+        with self.assertRaises(ValueError):
+            TimeSeries.from_numpy(timestamps, [1.0, 2.0], name='TEST5')
+        with self.assertRaises(TypeError):
+            TimeSeries.from_numpy(timestamps, ['a', 'b', 'c'], name='TEST6')
+
+    def test_resample(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        ts = TimeSeries(name='TEST1', records=[TsRecord(start + timedelta(seconds=i * 20), i) for i in (4, 0, 1, 2, 3)]
+                        + [TsRecord(start + timedelta(seconds=30), None)])
+
+        # with and without NumPy
+        for optional_numpy in (jts._optional_numpy, lambda: None):
+            with mock.patch.object(jts, '_optional_numpy', optional_numpy):
+                minutes = ts.resample(timedelta(minutes=1))
+                self.assertEqual([(r.timestamp, r.value) for r in minutes.records],
+                                 [(start, 1.0), (start + timedelta(minutes=1), 3.5)])
+                self.assertEqual([r.value for r in ts.resample(timedelta(minutes=1), 'count').records], [3, 2])
+                self.assertEqual([r.value for r in ts.resample(timedelta(minutes=1), 'last').records], [2.0, 4.0])
+                self.assertEqual([r.value for r in ts.resample(timedelta(seconds=40), 'max',
+                                                               origin=start + timedelta(seconds=20)).records],
+                                 [0.0, 2.0, 4.0])
+
+        with self.assertRaises(ValueError):
+            ts.resample(timedelta(minutes=1), 'median')
+        with self.assertRaises(TypeError):
+            TimeSeries(name='TEST2', data_type='TEXT').resample(timedelta(minutes=1))
+
+    def test_downsample(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        values = [0, 0, 10, 0, 0, 0, -10, 0, 0, 1]
+        ts = TimeSeries(name='TEST1', columnar=True, records=[
+            TsRecord(start + timedelta(seconds=i), v, quality=i) for i, v in enumerate(values)])
+
+        for optional_numpy in (jts._optional_numpy, lambda: None):
+            with mock.patch.object(jts, '_optional_numpy', optional_numpy):
+                lttb = ts.downsample(4)
+                self.assertEqual([r.value for r in lttb.records], [0, 10, -10, 1])
+                self.assertEqual(lttb.records[1].quality, 2)
+                self.assertEqual([r.value for r in ts.downsample(4, 'minmax').records], [0, 10, -10, 1])
+                self.assertEqual(len(ts.downsample(20)), 10)
+
+    def test_columnar_value_type(self):
+        with self.assertRaises(TypeError):
+            TimeSeries(name='TEST1', records=[TsRecord(self.NOW, '2.34')], columnar=True)
+
+        # a batch with a bad value is rejected as a whole, as by list storage
+        for columnar in (False, True):
+            for validation in ('strict', 'trusted') if columnar else ('strict',):
+                ts = TimeSeries(name='TEST2', records=[TsRecord(self.ONE_MINUTE_AGO, 1, quality=1)],
+                                columnar=columnar, validation=validation)
+                with self.assertRaises(TypeError):
+                    ts.insert([TsRecord(self.NOW, 2, quality=2, annotation='a'), TsRecord(self.NOW, '2.34')])
+                self.assertEqual([(r.value, r.quality, r.annotation) for r in ts.records], [(1, 1, None)])
+                ts.insert(TsRecord(self.NOW, 3))
+                self.assertEqual([r.value for r in ts.records], [1, 3])
+
+    def test_validation(self):
+        bad = TsRecord(self.NOW, '2.34')
+
+        ts = TimeSeries(name='TEST1', records=self.NUMBER_RECORDS)
+        with self.assertRaises(TypeError):
+            ts.insert([TsRecord(self.NOW, 3), bad])
+        with self.assertRaises(TypeError):
+            ts.insert("record")
+        self.assertEqual(len(ts), 3)
+
+        # checked once, when the document is built
+        ts = TimeSeries(name='TEST2', records=self.NUMBER_RECORDS, validation='deferred')
+        ts.insert(bad)
+        with self.assertRaises(TypeError):
+            JtsDocument(ts).toJSONString()
+        with self.assertRaises(TypeError):
+            ts.validate()
+        ts.records.remove(bad)
+        self.assertEqual(len(JtsDocument(ts).toJSON()['data']), 3)
+
+        ts = TimeSeries(name='TEST3', records=[bad], validation='trusted')
+        ts.insert(bad)
+        self.assertEqual(len(ts), 2)
+        with self.assertRaises(TypeError):
+            ts.validate()
+
+        with self.assertRaises(ValueError):
+            TimeSeries(name='TEST4', validation='lazy')
+
     # TODO N: test_to_JSON
     # def test_to_JSON(self):
     #     ts = TimeSeries(name='TEST1', identifier=self.TEST_UUID, units='C', records=self.NUMBER_RECORDS)
@@ -192,6 +388,205 @@ class TestJtsDocument(unittest.TestCase):
         jts_payload = jts_document.toJSONString()
         self.assertEqual(jts_payload, json.dumps(json.loads(jts_str)))
 
+    def test_toJSON_columnar(self):
+        tz = timezone(timedelta(hours=10))
+        records = self.NUMBER_SUBSECOND_RECORDS_OUT_OF_ORDER + [
+            TsRecord(self.NOW.replace(tzinfo=tz), 3.5, annotation='aware'),
+            TsRecord(self.ONE_MINUTE_LATER, None, quality=5),
+            TsRecord(self.ONE_MINUTE_LATER + timedelta(seconds=1))]
+        text_records = [TsRecord(self.NOW, 'text', quality=1), TsRecord(self.ONE_MINUTE_AGO, None, annotation='a')]
+
+        expected = JtsDocument([TimeSeries(name="ts", identifier="series_1", records=records),
+                                TimeSeries(name="txt", identifier="series_2", data_type='TEXT', records=text_records)])
+        jts_doc = JtsDocument([TimeSeries(name="ts", identifier="series_1", records=records, columnar=True),
+                               TimeSeries(name="txt", identifier="series_2", data_type='TEXT', records=text_records,
+                                          columnar=True)])
+
+        self.assertEqual(jts_doc.toJSONString(), expected.toJSONString())
+
+    @unittest.skipUnless(hasattr(time, 'tzset'), "requires time.tzset")
+    def test_naive_timestamps(self):
+        # wall-clock times are written unchanged, even if they do not exist in the local timezone
+        tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            records = [TsRecord(datetime(2024, 3, 10, 2, 30), 1), TsRecord(datetime(2024, 3, 10, 2, 30, 0, 500), 2),
+                       TsRecord(datetime(2024, 11, 3, 1, 30, fold=1), 3)]
+            for columnar in (False, True):
+                data = JtsDocument(TimeSeries(name="ts", records=records, columnar=columnar)).toJSON()['data']
+                # records within the same millisecond share a row
+                self.assertEqual([(row['ts'], row['f'][0]['v']) for row in data],
+                                 [("2024-03-10T02:30:00.000", 2), ("2024-11-03T01:30:00.000", 3)])
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+
+    def test_write(self):
+        jts_doc = JtsDocument([TimeSeries(name="ts", identifier="series_1", records=self.NUMBER_SUBSECOND_RECORDS),
+                               TimeSeries(name="ts2", identifier="series_2", units="C", records=self.NUMBER_RECORDS)])
+        expected = jts_doc.toJSONString()
+
+        self.assertEqual(''.join(jts_doc.iter_chunks(chunk_size=2)), expected)
+
+        text_fp = io.StringIO()
+        jts_doc.write(text_fp)
+        self.assertEqual(text_fp.getvalue(), expected)
+
+        binary_fp = io.BytesIO()
+        with gzip.GzipFile(fileobj=binary_fp, mode='wb') as gz:
+            jts_doc.write(gz, chunk_size=1)
+        self.assertEqual(gzip.decompress(binary_fp.getvalue()).decode('utf-8'), expected)
+
+    def test_timestamp_formatting(self):
+        format_ts = jts._TimestampFormatter()
+        zones = [None, timezone.utc, timezone(timedelta(hours=-3, minutes=-30)), timezone(timedelta(seconds=3601))]
+        if ZoneInfo is not None:
+            zones.append(ZoneInfo('Europe/Berlin'))
+        # around a daylight saving time change
+        start = int(datetime(2024, 3, 31, 0, 58, tzinfo=timezone.utc).timestamp() * 1000)
+        for ms in range(start, start + 5 * 60000, 997):
+            for tz in zones:
+                self.assertEqual(format_ts(ms, tz), jts._from_epoch_ms(ms, tz).isoformat(timespec='milliseconds'))
+
+        # parsed timestamps carry equal but distinct timezone objects
+        format_ts = jts._TimestampFormatter()
+        for i in range(3):
+            tz = datetime.fromisoformat('2024-01-01T00:00:00.000+02:00').tzinfo
+            expected = jts._from_epoch_ms(start + i, tz).isoformat(timespec='milliseconds')
+            self.assertEqual(format_ts(start + i, tz), expected)
+        self.assertEqual(len(format_ts._cache), 1)
+        for minute in range(format_ts.CACHE_SIZE + 10):
+            format_ts(minute * 60000)
+        self.assertLessEqual(len(format_ts._cache), format_ts.CACHE_SIZE)
+
+    def test_toJSONBytes(self):
+        jts_doc = JtsDocument([TimeSeries(name="ts", identifier="series_1", records=self.NUMBER_SUBSECOND_RECORDS),
+                               TimeSeries(name="ts2", identifier="series_2", units="C", records=self.NUMBER_RECORDS),
+                               TimeSeries(name="ts3", identifier="series_3", data_type="TEXT", records=[
+                                   TsRecord(self.NOW, "ünïcode"), TsRecord(self.ONE_MINUTE_AGO, 2 ** 70)])])
+        expected = jts_doc.toJSONString()
+
+        self.assertEqual(jts_doc.toJSONBytes('json'), expected.encode('utf-8'))
+        self.assertEqual(json.loads(jts_doc.toJSONBytes()), json.loads(expected))
+        self.assertEqual(JtsDocument.fromJSON(jts_doc.toJSONBytes()).toJSONString(), expected)
+        with self.assertRaises(ValueError):
+            jts_doc.toJSONBytes('yaml')
+
+        # NaN and infinite values are not written as null
+        for columnar in (False, True):
+            jts_doc = JtsDocument(TimeSeries(name="ts", identifier="series_1", columnar=columnar, records=[
+                TsRecord(self.NOW, float('nan')), TsRecord(self.ONE_MINUTE_LATER, None),
+                TsRecord(self.ONE_MINUTE_AGO, float('-inf'))]))
+            self.assertEqual(JtsDocument.fromJSON(jts_doc.toJSONBytes()).toJSONString(), jts_doc.toJSONString())
+
+        jts_doc = JtsDocument(TimeSeries(name="ts", identifier="series_1", records=self.NUMBER_RECORDS),
+                              incremental=True)
+        self.assertEqual(jts_doc.toJSONBytes('json'), jts_doc.toJSONString().encode('utf-8'))
+        with self.assertRaises(ValueError):
+            jts_doc.toJSONBytes('orjson')
+
+    def test_async(self):
+        jts_doc = JtsDocument([TimeSeries(name="ts", identifier="series_1", records=self.NUMBER_SUBSECOND_RECORDS),
+                               TimeSeries(name="ts2", identifier="series_2", units="C", records=self.NUMBER_RECORDS)])
+        expected = jts_doc.toJSONString()
+
+        async def round_trip(executor):
+            written = io.BytesIO()
+            await jts_doc.awrite(written, chunk_size=1, executor=executor)
+            self.assertEqual(written.getvalue().decode('utf-8'), expected)
+
+            stream = asyncio.StreamReader()
+            stream.feed_data(written.getvalue())
+            stream.feed_eof()
+            return await JtsDocument.aread(stream, chunk_size=16, executor=executor)
+
+        for executor in (None, ThreadPoolExecutor(1)):
+            self.assertEqual(asyncio.run(round_trip(executor)).toJSONString(), expected)
+
+    def test_toJSONString_parallel(self):
+        n = 5000
+        jts_doc = JtsDocument([
+            TimeSeries(name="a", identifier="a",
+                       records=[TsRecord(self.NOW + timedelta(seconds=i), i) for i in range(n)]),
+            TimeSeries(name="b", identifier="b", columnar=True,
+                       records=[TsRecord(self.NOW + timedelta(seconds=i, milliseconds=500), i / 2) for i in range(n)]),
+            TimeSeries(name="c", identifier="c", units="C",
+                       records=[TsRecord(self.NOW + timedelta(seconds=i * 7 % n), i, quality=i % 3)
+                                for i in range(n)])])
+
+        self.assertEqual(jts_doc.toJSONString(workers=2), jts_doc.toJSONString())
+
+        # parts are sent to the workers in columnar storage
+        parts = []
+
+        def encode(part):
+            parts.append(part)
+            return part._encode_data_fragment()
+
+        with mock.patch.object(jts.concurrent.futures, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch.object(jts, '_encode_data_fragment', encode):
+            self.assertEqual(jts_doc.toJSONString(workers=2), jts_doc.toJSONString())
+        self.assertEqual(len(parts), 4)
+        self.assertTrue(all(s.columnar for part in parts for s in part.series))
+
+    def test_resample(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        jts_doc = JtsDocument([
+            TimeSeries(name="a", identifier="a",
+                       records=[TsRecord(start + timedelta(seconds=i * 7), i) for i in range(20)]),
+            TimeSeries(name="b", identifier="b",
+                       records=[TsRecord(start + timedelta(seconds=i * 11), i) for i in range(20)])])
+
+        data = jts_doc.resample(timedelta(minutes=1), 'last').toJSON()['data']
+        self.assertEqual(len(data), 4)
+        self.assertEqual(data[1], {"ts": "2024-01-01T00:01:00.000+00:00", "f": {0: {"v": 17.0}, 1: {"v": 10.0}}})
+
+    def test_paginate(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        jts_doc = JtsDocument([
+            TimeSeries(name="a", identifier="a",
+                       records=[TsRecord(start + timedelta(seconds=i), i) for i in range(10)]),
+            TimeSeries(name="b", identifier="b", units="C",
+                       records=[TsRecord(start + timedelta(seconds=i * 2), i, quality=1) for i in range(10)])])
+
+        pages = list(jts_doc.paginate(max_records=4))
+        self.assertEqual([json.loads(p)['header']['recordCount'] for p in pages], [4, 4, 4, 3])
+        self.assertEqual(pages[1], jts_doc.toJSONString(start=start + timedelta(seconds=4),
+                                                        end=start + timedelta(seconds=8)))
+        self.assertEqual(sum((json.loads(p)['data'] for p in pages), []), json.loads(jts_doc.toJSONString())['data'])
+
+        pages = list(jts_doc.paginate(max_bytes=600))
+        self.assertTrue(all(len(p.encode('utf-8')) <= 600 for p in pages))
+        self.assertEqual(sum(json.loads(p)['header']['recordCount'] for p in pages), 15)
+        with self.assertRaises(ValueError):
+            list(jts_doc.paginate(max_bytes=300))
+
+    def test_toJSONString_incremental(self):
+        ts1 = TimeSeries(name="a", identifier="a", records=[TsRecord(self.ONE_MINUTE_AGO, 1)])
+        ts2 = TimeSeries(name="b", identifier="b", columnar=True, records=[TsRecord(self.ONE_MINUTE_AGO, 2)])
+        jts_doc = JtsDocument([ts1, ts2], incremental=True)
+        self.assertEqual(jts_doc.toJSONString(), JtsDocument([ts1, ts2]).toJSONString())
+
+        # appended after the end time, at the end time, then before it
+        for ts, record in ((ts1, TsRecord(self.NOW, 3)),
+                           (ts2, TsRecord(self.NOW, 4, quality=1)),
+                           (ts2, TsRecord(self.NOW - timedelta(seconds=30), 5))):
+            ts.insert(record)
+            self.assertEqual(jts_doc.toJSONString(), JtsDocument([ts1, ts2]).toJSONString())
+
+        jts_doc.addSeries(TimeSeries(name="c", identifier="c", records=[TsRecord(self.NOW, "x")], data_type="TEXT"))
+        self.assertEqual(jts_doc.toJSONString(), JtsDocument(jts_doc.series).toJSONString())
+
+        # records changed in place
+        ts1.records[0].value = 99
+        ts1.records[1] = TsRecord(self.NOW, 98)
+        jts_doc.invalidate()
+        self.assertEqual(jts_doc.toJSONString(), JtsDocument(jts_doc.series).toJSONString())
+
     def test_fromJSON(self):
         timeseries1 = TimeSeries(identifier='series_1', name='Series 1', data_type='NUMBER', records=[
             TsRecord(**{"timestamp": self.ONE_MINUTE_AGO, "value": 1.23, "quality": 192, "annotation": 'comment'}),
@@ -269,6 +664,294 @@ class TestJtsDocument(unittest.TestCase):
 
         self.assertEqual(jts_loaded.toJSON(), jts_document.toJSON())
 
+    def test_fromJSON_timestamp_formats(self):
+        jts_str = json.dumps({
+            "docType": "jts", "version": "1.0",
+            "header": {"columns": {"0": {"id": "series_1", "name": "Series 1", "dataType": "NUMBER"}}},
+            "data": [{"ts": "2023-01-02T03:04:05.678+10:00", "f": {"0": {"v": 1}}},
+                     {"ts": "2023-01-02T03:04:06Z", "f": {"0": {"v": 2}}},
+                     {"ts": "2023-01-03T03:04:07.123", "f": {"0": {"v": 3}}},
+                     {"ts": "Jan 4 2023 03:04:08 +0100", "f": {"0": {"v": 4}}}]
+        })
+
+        records = JtsDocument.fromJSON(jts_str).getSeries('series_1').records
+        self.assertEqual([r.timestamp for r in records], [
+            datetime(2023, 1, 2, 3, 4, 5, 678000, tzinfo=timezone(timedelta(hours=10))),
+            datetime(2023, 1, 2, 3, 4, 6, tzinfo=timezone.utc),
+            datetime(2023, 1, 3, 3, 4, 7, 123000),
+            datetime(2023, 1, 4, 3, 4, 8, tzinfo=timezone(timedelta(hours=1)))])
+
+        # timezones of the dateutil parser are not hashable
+        jts_doc = JtsDocument.fromJSON(jts_str)
+        self.assertEqual(json.loads(jts_doc.toJSONString())["data"][3]["ts"], "2023-01-04T03:04:08.000+01:00")
+        self.assertEqual(JtsDocument.fromJSON(jts_doc.toJSONString()).toJSONString(), jts_doc.toJSONString())
+
+    def test_fromJSON_series_subset(self):
+        jts_doc = JtsDocument([
+            TimeSeries(name="Series 1", identifier="series_1", records=self.NUMBER_RECORDS),
+            TimeSeries(name="Series 2", identifier="series_2", records=[TsRecord(self.ONE_MINUTE_LATER, 5)]),
+            TimeSeries(name="Series 3", identifier="series_3", units="C", records=self.NUMBER_SUBSECOND_RECORDS)])
+        expected = JtsDocument([
+            TimeSeries(name="Series 2", identifier="series_2", records=[TsRecord(self.ONE_MINUTE_LATER, 5)]),
+            TimeSeries(name="Series 3", identifier="series_3", units="C", records=self.NUMBER_SUBSECOND_RECORDS)])
+        jts_str = jts_doc.toJSONString()
+
+        for loaded in (JtsDocument.fromJSON(jts_str, series=['series_3', 'series_2']),
+                       JtsDocument.read(io.StringIO(jts_str), series=['series_3', 'series_2'])):
+            self.assertEqual([s.identifier for s in loaded.series], ['series_2', 'series_3'])
+            self.assertEqual(loaded.toJSONString(), expected.toJSONString())
+
+        self.assertEqual(len(JtsDocument.fromJSON(jts_str, series=[])), 0)
+
+    def test_read(self):
+        jts_doc = JtsDocument([
+            TimeSeries(name="ts", identifier="series_1", records=self.NUMBER_SUBSECOND_RECORDS),
+            TimeSeries(name="Température", identifier="series_2", units="°C", data_type='TEXT',
+                       records=[TsRecord(self.NOW, 'naïve'), TsRecord(self.ONE_MINUTE_LATER, 'ok', annotation='✓')])])
+        jts_str = jts_doc.toJSONString()
+        # pretty printed, non-ASCII text
+        jts_utf8 = json.dumps(json.loads(jts_str), indent=2, ensure_ascii=False).encode('utf-8')
+
+        for fp in (io.StringIO(jts_str), io.BytesIO(jts_utf8)):
+            self.assertEqual(JtsDocument.read(fp, chunk_size=7).toJSONString(), jts_str)
+
+        records = list(JtsDocument.iter_records(io.BytesIO(jts_utf8), chunk_size=1))
+        self.assertEqual(len(records), 7)
+        self.assertEqual([i for i, r in records].count(1), 2)
+        self.assertEqual(records[-1][1].annotation, '✓')
+
+        reader = JtsReader()
+        rows = reader.feed(jts_str[:len(jts_str) // 2])
+        self.assertEqual(reader.columns['1']['name'], 'Température')
+        rows += reader.feed(jts_str[len(jts_str) // 2:]) + reader.close()
+        self.assertEqual(rows, json.loads(jts_str)['data'])
+
+        with self.assertRaises(ValueError):
+            reader = JtsReader()
+            reader.feed(jts_str[:-3])
+            reader.close()
+
+    def test_binary(self):
+        start = datetime(2024, 1, 1, 12, 30)
+        ts1 = TimeSeries(name="a", identifier="a", units="C", records=[
+            TsRecord(start + timedelta(seconds=i), [1.5, None, 2, 2 ** 60, True][i % 5],
+                     quality=192 if i < 7 else None, annotation="x" if i == 3 else None) for i in range(20)])
+        ts2 = TimeSeries(name="b", identifier="b", data_type="TEXT", columnar=True, records=[
+            TsRecord(datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=i % 2))) + timedelta(minutes=i),
+                     ["on", "off", None][i % 3]) for i in range(10)])
+        jts_doc = JtsDocument([ts1, ts2])
+
+        def fields(ts):
+            return [(r.timestamp, r.value, type(r.value), r.quality, r.annotation) for r in ts.records]
+
+        decoded = JtsDocument.from_binary(jts_doc.to_binary())
+        self.assertEqual(decoded.toJSONString(), jts_doc.toJSONString())
+        self.assertEqual(fields(decoded.series[0]), fields(ts1))
+        self.assertEqual(fields(TimeSeries.from_bytes(ts2.to_bytes())), fields(ts2))
+
+        with self.assertRaises(ValueError):
+            JtsDocument.from_binary(ts2.to_bytes())
+        with self.assertRaises(ValueError):
+            JtsDocument.from_binary(jts_doc.to_binary()[:-3])
+
+    def test_merge(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        a = TimeSeries(name="a", identifier="a", records=[TsRecord(start + timedelta(seconds=i), i) for i in (0, 2, 4)])
+        b = TimeSeries(name="a", identifier="a", columnar=True,
+                       records=[TsRecord(start + timedelta(seconds=i), -i) for i in (4, 1, 2, 2)])
+        c = TimeSeries(name="c", identifier="c", records=[TsRecord(start, 1.5)])
+
+        jts_doc = JtsDocument(TimeSeries(name="a", identifier="a", records=list(a.records)))
+        jts_doc.merge(JtsDocument([b, c]))
+        self.assertEqual(len(jts_doc), 2)
+        self.assertEqual([(r.timestamp.second, r.value) for r in jts_doc.getSeries("a").records],
+                         [(0, 0), (1, -1), (2, -2), (4, -4)])
+        self.assertTrue(jts_doc.getSeries("a").is_sorted)
+        self.assertEqual(len(b), 4)
+
+        a.merge(b, on_conflict='keep_first')
+        self.assertEqual([r.value for r in a.records], [0, -1, 2, 4])
+
+        a.merge(TimeSeries(name="a", records=[TsRecord(start, 0)]), on_conflict='error')
+        with self.assertRaises(ValueError):
+            a.merge(TimeSeries(name="a", records=[TsRecord(start, 5)]), on_conflict='error')
+        with self.assertRaises(ValueError):
+            a.merge(TimeSeries(name="a", data_type="TEXT", records=[TsRecord(start, "x")]))
+        self.assertEqual(len(a), 4)
+
+    def test_stats(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        phases = []
+        stats = JtsStats(callback=lambda phase, seconds: phases.append(phase))
+        jts_doc = JtsDocument([
+            TimeSeries(name="a", records=[TsRecord(start + timedelta(seconds=i), i if i != 2 else None)
+                                          for i in range(4)]),
+            TimeSeries(name="b", records=[TsRecord(start, 1.5)])], stats=stats)
+
+        json_str = jts_doc.toJSONString()
+        self.assertEqual(phases, ['data', 'header', 'encode'])
+        self.assertEqual(stats.counts, dict(records=5, skipped=1, rows=3, fields=4))
+        self.assertTrue(all(seconds >= 0 for seconds in stats.timings.values()))
+
+        stats.reset()
+        loaded = JtsDocument.fromJSON(json_str, stats=stats)
+        self.assertIs(loaded.stats, stats)
+        self.assertEqual(stats.counts, dict(parsed_rows=3, parsed_records=4))
+        self.assertEqual(set(stats.as_dict()['timings']), {'parse', 'load', 'timestamps'})
+
+        stats.reset()
+        JtsDocument.read(io.StringIO(json_str), stats=stats)
+        self.assertEqual(stats.counts, dict(parsed_rows=3, parsed_records=4))
+
+    def test_clone(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        a = TimeSeries(name="a", identifier="a", records=[TsRecord(start + timedelta(seconds=i), i) for i in (2, 0, 1)])
+        b = TimeSeries(name="b", identifier="b", columnar=True, records=[TsRecord(start, 1.5)])
+        jts_doc = JtsDocument([a, b])
+        expected = jts_doc.toJSONString()
+
+        cloned = jts_doc.clone()
+        self.assertIs(cloned.series[0].records, a.records)
+        cloned.series[0].insert(TsRecord(start + timedelta(seconds=3), 3))
+        cloned.series[0].sort()
+        cloned.series[1].insert(TsRecord(start + timedelta(seconds=1), 2.5))
+        cloned.series[1].name = "c"
+        self.assertEqual(jts_doc.toJSONString(), expected)
+        self.assertEqual([r.value for r in cloned.series[0].records], [0, 1, 2, 3])
+        self.assertEqual(len(cloned.series[1]), 2)
+
+        a.sort()
+        self.assertEqual([r.value for r in a.records], [0, 1, 2])
+        self.assertEqual(len(cloned.series[0]), 4)
+
+        subset = jts_doc.clone(series=["b"])
+        self.assertEqual([s.identifier for s in subset.series], ["b"])
+        self.assertEqual(subset.series[0].name, "b")
+
+    def test_csv_ndjson(self):
+        csv_str = ("timestamp,temp,temp_q,state\n"
+                   "2024-01-01 00:00:00,1.5,192,on\n"
+                   "2024-01-01 00:00:01.250,2,,\n"
+                   "\n"
+                   "2024-01-01T00:00:02+01:00,,100,off\n")
+        jts_doc = JtsDocument.from_csv(io.StringIO(csv_str), quality={'temp': 'temp_q'}, data_types={'state': 'TEXT'},
+                                       tz=timezone.utc)
+        temp, state = jts_doc.series
+        self.assertEqual((temp.identifier, state.identifier, state.data_type), ('temp', 'state', 'TEXT'))
+        self.assertTrue(temp.columnar)
+        self.assertEqual([(r.timestamp, r.value, r.quality) for r in temp.records], [
+            (datetime(2024, 1, 1, tzinfo=timezone.utc), 1.5, 192),
+            (datetime(2024, 1, 1, 0, 0, 1, 250000, tzinfo=timezone.utc), 2, None),
+            (datetime(2024, 1, 1, 0, 0, 2, tzinfo=timezone(timedelta(hours=1))), None, 100)])
+        self.assertEqual([r.value for r in state.records], ['on', 'off'])
+
+        ndjson = "\n".join(json.dumps(dict(timestamp=r.timestamp.isoformat(), temp=r.value, temp_q=r.quality,
+                                            state=s.value if s else None))
+                           for r, s in zip(temp.records, [state.records[0], None, state.records[1]]))
+        loaded = JtsDocument.from_ndjson(io.BytesIO(ndjson.encode()), quality={'temp': 'temp_q'},
+                                         data_types={'state': 'TEXT'})
+        self.assertEqual(loaded.toJSONString(), jts_doc.toJSONString())
+
+        ts = TimeSeries.from_csv(io.StringIO("t,v\n1700000000,1\n1700000001.5,2.5\n"), value='v', timestamp='t',
+                                 timestamp_format='epoch_s', name='V')
+        self.assertEqual((ts.name, ts.identifier), ('V', 'v'))
+        self.assertEqual(ts.records[1].timestamp, datetime(2023, 11, 14, 22, 13, 21, 500000, tzinfo=timezone.utc))
+
+        with self.assertRaises(ValueError):
+            JtsDocument.from_csv(io.StringIO("timestamp,a\n2024-01-01,1,2\n"))
+        with self.assertRaises(ValueError):
+            JtsDocument.from_csv(io.StringIO("time,a\n2024-01-01,1\n"))
+        with self.assertRaises(ValueError):
+            JtsDocument.from_csv(io.StringIO("timestamp,a\n2024-01-01,x\n"))
+
+    def test_segment(self):
+        start = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+        records = [TsRecord(start + timedelta(seconds=i), [1.5, None, 2][i % 3], quality=192 if i < 4 else None)
+                   for i in range(10)]
+        ts = TimeSeries(name="a", identifier="a", units="C", records=records[:6])
+
+        def fields(ts):
+            return [(r.timestamp, r.value, type(r.value), r.quality, r.annotation) for r in ts.records]
+
+        with tempfile.TemporaryDirectory() as path:
+            path = os.path.join(path, "a")
+            ts.to_segment(path)
+            append_segment(path, records[6:])
+            opened = TimeSeries.from_segment(path)
+            self.assertIsInstance(opened.records.timestamps, memoryview)
+            self.assertEqual(fields(opened), fields(TimeSeries(name="a", records=records)))
+            expected = TimeSeries(name="a", identifier="a", units="C", records=records)
+            self.assertEqual(JtsDocument(opened).toJSONString(), JtsDocument(expected).toJSONString())
+
+            # records inserted into an opened series are kept in memory
+            opened.insert(TsRecord(start - timedelta(seconds=1), 0.5))
+            self.assertEqual(opened.records[0].value, 0.5)
+            self.assertEqual(len(TimeSeries.from_segment(path)), 10)
+
+            # a segment rewritten from its own mapped series, while still mapped
+            path = os.path.join(os.path.dirname(path), "b")
+            TimeSeries(name="b", columnar=True, records=[TsRecord(start + timedelta(seconds=i), i)
+                                                         for i in range(100000)]).to_segment(path)
+            mapped = TimeSeries.from_segment(path)
+            mapped.to_segment(path)
+            TimeSeries.from_segment(path).slice(end=start + timedelta(seconds=10)).to_segment(path)
+            self.assertEqual(mapped.records.values[99999], 99999)
+            self.assertEqual(len(TimeSeries.from_segment(path)), 10)
+
+    @unittest.skipUnless(pandas, "requires pandas")
+    def test_dataframe(self):
+        utc = timezone.utc
+        now = datetime(2023, 1, 1, 12, tzinfo=utc)
+        jts_doc = JtsDocument([
+            TimeSeries(identifier='series_1', name='Series 1', units='C', records=[
+                TsRecord(now, 1.5), TsRecord(now + timedelta(seconds=1), 2.5)]),
+            TimeSeries(identifier='series_2', name='Series 2', records=[
+                TsRecord(now + timedelta(seconds=1), 7), TsRecord(now + timedelta(seconds=2), 8)])])
+
+        df = jts_doc.to_dataframe()
+        self.assertEqual(list(df.columns), ['series_1', 'series_2'])
+        self.assertEqual(len(df), 3)
+        self.assertTrue(numpy.isnan(df['series_1'].iloc[2]))
+        self.assertEqual(df['series_2'].iloc[1], 7)
+
+        loaded = JtsDocument.from_dataframe(df)
+        self.assertEqual(loaded.toJSONString(), JtsDocument([
+            TimeSeries(identifier='series_1', name='Series 1', units='C', records=[
+                TsRecord(now, 1.5), TsRecord(now + timedelta(seconds=1), 2.5)]),
+            TimeSeries(identifier='series_2', name='Series 2', records=[
+                TsRecord(now + timedelta(seconds=1), 7.0), TsRecord(now + timedelta(seconds=2), 8.0)])
+        ]).toJSONString())
+
+    def test_findSeries(self):
+        jts_doc = JtsDocument([TimeSeries(identifier='a', name='Temp'), TimeSeries(identifier='b', name='Flow')])
+        jts_doc.addSeries([TimeSeries(identifier='c', name='Temp'), TimeSeries(identifier='a', name='Level')])
+
+        self.assertEqual([s.identifier for s in jts_doc.findSeries(name='Temp')], ['a', 'c'])
+        self.assertEqual([s.name for s in jts_doc.findSeries(identifier='a')], ['Temp', 'Level'])
+        self.assertEqual(jts_doc.findSeries(identifier='a', name='Level'), [jts_doc.series[3]])
+        self.assertEqual(jts_doc.getColumnIndex('c'), 2)
+        self.assertIsNone(jts_doc.getColumnIndex('x'))
+
+        # changes made directly to series are found as well
+        jts_doc.series[1].identifier = 'y'
+        jts_doc.series[0] = TimeSeries(identifier='x', name='Temp')
+        self.assertEqual(jts_doc.getColumnIndex('x'), 0)
+        self.assertEqual(jts_doc.getSeries('a'), jts_doc.series[3])
+        jts_doc.series[0].identifier = 'y'
+        self.assertEqual(jts_doc.findSeries('y'), jts_doc.series[:2])
+        self.assertIsNone(jts_doc.getColumnIndex('x'))
+        jts_doc.series[3].identifier = 'z'
+        self.assertEqual(jts_doc.getSeries('z'), jts_doc.series[3])
+        self.assertIsNone(jts_doc.getSeries('a'))
+        jts_doc.series[2].name = 'Level'
+        self.assertEqual(jts_doc.findSeries(name='Level'), jts_doc.series[2:])
+        jts_doc.series[1] = TimeSeries(identifier='a', name='Flow')
+        self.assertEqual(jts_doc.getColumnIndex('a'), 1)
+
+        # a replaced series list is reindexed
+        jts_doc.series = jts_doc.series[2:]
+        self.assertEqual(jts_doc.getColumnIndex('c'), 0)
+
     def test_getSeriesByID(self):
         timeseries1 = TimeSeries(identifier='series_1', name='Series 1', data_type='NUMBER', records=[
             TsRecord(**{"timestamp": self.ONE_MINUTE_AGO, "value": 1.23, "quality": 192, "annotation": 'comment'}),
@@ -334,6 +1017,28 @@ class TestJtsDocument(unittest.TestCase):
         if __name__ == '__main__':
             unittest.main()
 
+    def test_mergeInterleavedSeries(self):
+        # series 0 and 2 share timestamps, series 1 is interleaved and out of order, series 2 has a duplicate
+        jts_doc = JtsDocument([
+            TimeSeries(name="a", identifier="a", records=[TsRecord(self.ONE_MINUTE_AGO, 1), TsRecord(self.NOW, 2)]),
+            TimeSeries(name="b", identifier="b", records=[TsRecord(self.ONE_MINUTE_LATER, 3),
+                                                          TsRecord(self.NOW, 4),
+                                                          TsRecord(self.THREE_MILISECONDS_AGO, 5)]),
+            TimeSeries(name="c", identifier="c", records=[TsRecord(self.ONE_MINUTE_AGO, 6), TsRecord(self.NOW, 7),
+                                                          TsRecord(self.NOW, 8)], columnar=True),
+        ])
+
+        data = jts_doc.toJSON()['data']
+        self.assertEqual([row['ts'] for row in data],
+                         [t.isoformat(timespec='milliseconds') for t in
+                          (self.ONE_MINUTE_AGO, self.THREE_MILISECONDS_AGO, self.NOW, self.ONE_MINUTE_LATER)])
+        self.assertEqual([row['f'] for row in data], [
+            {0: {'v': 1}, 2: {'v': 6}},
+            {1: {'v': 5}},
+            {0: {'v': 2}, 1: {'v': 4}, 2: {'v': 8}},
+            {1: {'v': 3}}])
+        self.assertEqual([list(row['f']) for row in data], [[0, 2], [1], [0, 1, 2], [1]])
+
     def test_TimeSeries_with_str_value(self):
         # test if TimeSeries raises TypeError when value is not float or int
 
@@ -0,0 +1,43 @@
+import os
+import tracemalloc
+import unittest
+from datetime import datetime
+
+from json_timeseries import TsRecord, ColumnarRecords
+
+# number of records measured, can be lowered for quick runs
+RECORDS = int(os.environ.get('JTS_MEMORY_RECORDS', 1000000))
+
+
+class TestMemory(unittest.TestCase):
+    """
+    Memory benchmark of record storage, in bytes per record
+    """
+
+    def setUp(self):
+        self.NOW = datetime.now()
+
+    def measure(self, build):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            result = build()
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(result), RECORDS)
+        return used / RECORDS
+
+    def test_record_bytes(self):
+        # timestamp and value objects are shared, so only the record itself and its list slot are measured
+        bytes_per_record = self.measure(lambda: [TsRecord(self.NOW, 1.5) for _ in range(RECORDS)])
+        self.assertLess(bytes_per_record, 80, "TsRecord uses %.1f bytes per record" % bytes_per_record)
+
+    def test_columnar_bytes(self):
+        record = TsRecord(self.NOW, 1.5)
+        bytes_per_record = self.measure(lambda: ColumnarRecords('NUMBER', [record] * RECORDS))
+        self.assertLess(bytes_per_record, 20, "ColumnarRecords uses %.1f bytes per record" % bytes_per_record)
+
+
+if __name__ == '__main__':
+    unittest.main()